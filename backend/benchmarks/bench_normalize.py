@@ -0,0 +1,75 @@
+"""
+Mide el efecto de normalize.py sobre las claves de la caché de búsquedas.
+
+Sobre un corpus de títulos reales de Spotify (track_names.tsv: "título<TAB>artistas")
+compara las claves de búsqueda sin normalizar ("nombre artista", como antes) con las
+normalizadas (normalize.search_query) y reporta:
+  - cuántas claves distintas quedan y la tasa de colapso (1 - normalizadas / crudas)
+  - los grupos de títulos que pasaron a compartir una sola clave
+  - el costo por llamada de la normalización
+
+Uso (desde backend/):
+    python benchmarks/bench_normalize.py [--rounds 200] [--show 15]
+"""
+import argparse
+import os
+import sys
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from models import Track  # noqa: E402
+from normalize import search_query  # noqa: E402
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "track_names.tsv")
+
+
+def load_corpus(path=CORPUS_PATH):
+    """Lee el corpus y retorna una lista de Track."""
+    tracks = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not line:
+                continue
+            name, artists = line.split("\t")
+            tracks.append(Track(name, [artist.strip() for artist in artists.split(",")]))
+    return tracks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=200, help="Pasadas sobre el corpus para medir el costo")
+    parser.add_argument("--show", type=int, default=15, help="Grupos colapsados a mostrar")
+    args = parser.parse_args()
+
+    tracks = load_corpus()
+    raw_keys = {track.label for track in tracks}
+
+    groups = defaultdict(set)
+    for track in tracks:
+        groups[search_query(track)].add(track.label)
+
+    collapse = 1 - len(groups) / len(raw_keys)
+    print(f"Corpus: {len(tracks)} tracks")
+    print(f"Distinct raw keys:        {len(raw_keys)}")
+    print(f"Distinct normalized keys: {len(groups)}")
+    print(f"Collapse ratio:           {collapse:.1%} fewer searches / cache entries")
+
+    merged = sorted((labels for labels in groups.values() if len(labels) > 1), key=len, reverse=True)
+    print(f"\n{len(merged)} keys now shared by several titles (showing {min(args.show, len(merged))}):")
+    for labels in merged[:args.show]:
+        print("  " + " | ".join(sorted(labels)))
+
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        for track in tracks:
+            search_query(track)
+    elapsed = time.perf_counter() - start
+    calls = args.rounds * len(tracks)
+    print(f"\nNormalization cost: {elapsed / calls * 1e6:.1f} µs/call ({calls} calls)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Mide la memoria que retiene un job de transferencia de ~10k canciones.
+
+Ejecuta transfer_all_playlists contra un cliente de YouTube Music simulado (sin red)
+y reporta, con tracemalloc, la memoria retenida por las canciones obtenidas de Spotify
+y por los resultados + progreso del job al terminar.
+
+Uso (desde backend/):
+    python benchmarks/bench_progress_memory.py
+"""
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import ytm  # noqa: E402
+from job_store import JobStore  # noqa: E402
+from models import Track  # noqa: E402
+
+PLAYLISTS = 50
+TRACKS_PER_PLAYLIST = 200
+MISS_EVERY = 10
+ARTISTS = [f"Artist {i}" for i in range(300)]
+ALBUMS = [f"Album {i}" for i in range(800)]
+
+
+def spotify_track(playlist_index, track_index):
+    """Canción con la misma forma que la respuesta de la API de Spotify."""
+    seed = playlist_index * 7919 + track_index * 31
+    return {
+        "id": f"sp{playlist_index:03d}{track_index:05d}xxxxxxxxx",
+        "name": f"Song {seed % 4000} {'MISS' if track_index % MISS_EVERY == 0 else ''}".strip(),
+        "artists": [{"name": ARTISTS[seed % len(ARTISTS)]}, {"name": ARTISTS[(seed // 3) % len(ARTISTS)]}],
+        "album": {"name": ALBUMS[seed % len(ALBUMS)]},
+        "duration_ms": 180000 + seed % 60000,
+        "external_ids": {"isrc": f"US{seed:010d}"},
+    }
+
+
+class FakeYTMusic:
+    """Cliente mínimo de YouTube Music sin red."""
+
+    def __init__(self):
+        self.library = []
+
+    def search(self, query, filter=None, limit=20):
+        if "MISS" in query:
+            return []
+        return [{"videoId": f"v{abs(hash(query)) % 10**11:011d}", "title": query, "artists": [], "duration_seconds": 200}]
+
+    def get_library_playlists(self, limit=25):
+        return self.library
+
+    def get_playlist(self, playlist_id, limit=None):
+        return {"tracks": []}
+
+    def create_playlist(self, name, description, privacy_status="PRIVATE", video_ids=None):
+        playlist_id = f"PL{len(self.library)}"
+        self.library.append({"playlistId": playlist_id, "title": name})
+        return playlist_id
+
+    def add_playlist_items(self, playlist_id, videoIds=None, duplicates=False):
+        return {"status": "STATUS_SUCCEEDED"}
+
+    def delete_playlist(self, playlist_id):
+        return "STATUS_SUCCEEDED"
+
+
+def main():
+    raw_playlists = {
+        f"playlist{p}": [spotify_track(p, t) for t in range(TRACKS_PER_PLAYLIST)]
+        for p in range(PLAYLISTS)
+    }
+
+    def fake_details(playlist_id, market="IN", cancel_token=None):
+        # Misma extracción que spotify.get_playlist_details_by_id
+        tracks = [Track.from_spotify(item) for item in raw_playlists[playlist_id]]
+        return {"name": playlist_id, "tracks": tracks, "image": None}
+
+    client = FakeYTMusic()
+    ytm.setup_ytmusic = lambda headers=None: client
+    ytm.get_playlist_details_by_id = fake_details
+
+    playlists = [{"id": pid, "name": pid, "total_tracks": TRACKS_PER_PLAYLIST} for pid in raw_playlists]
+
+    # Memoria de las canciones extraídas de Spotify (lo que viaja por el pipeline)
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    extracted = [fake_details(pid)["tracks"] for pid in raw_playlists]
+    tracks_bytes = tracemalloc.get_traced_memory()[0] - base
+    del extracted
+    tracemalloc.stop()
+
+    # Memoria retenida por resultados + progreso del job terminado
+    store = JobStore("bench")
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    store["job"] = {
+        "status": "in_progress", "processed": 0, "successful": 0, "failed": 0, "skipped": 0,
+        "playlists": [{"name": p["name"], "status": "pending", "id": p["id"]} for p in playlists],
+    }
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, "w")
+    try:
+        results = ytm.transfer_all_playlists(playlists, None, "job", store)
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+    job_bytes, job_peak = tracemalloc.get_traced_memory()
+    job_bytes -= base
+    job_peak -= base
+    tracemalloc.stop()
+
+    total_tracks = PLAYLISTS * TRACKS_PER_PLAYLIST
+    print(f"Job: {PLAYLISTS} playlists x {TRACKS_PER_PLAYLIST} tracks = {total_tracks} tracks "
+          f"({results['successful']} playlists created)")
+    print(f"Extracted Spotify tracks:   {tracks_bytes / 1024:9.1f} KiB ({tracks_bytes / total_tracks:6.1f} B/track)")
+    print(f"Results + progress (kept):  {job_bytes / 1024:9.1f} KiB ({job_bytes / total_tracks:6.1f} B/track)")
+    print(f"Job peak while running:     {job_peak / 1024:9.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
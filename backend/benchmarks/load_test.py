@@ -0,0 +1,137 @@
+"""
+Prueba de carga: workers sync contra workers con hilos (gthread) en endpoints lentos.
+
+Levanta gunicorn con una app WSGI mínima cuyo único endpoint espera LOAD_TEST_DELAY
+segundos (simula la espera a Spotify / YouTube Music), lanza muchas peticiones
+concurrentes contra cada modo y reporta throughput y latencias.
+
+Con --url se omite el servidor de prueba y se mide directamente un servidor ya
+levantado (por ejemplo GET /playlists con un token real).
+
+Uso (desde backend/):
+    python benchmarks/load_test.py
+    python benchmarks/load_test.py --requests 400 --concurrency 200 --delay 0.5
+    python benchmarks/load_test.py --url http://localhost:8000/playlists --header "Authorization: Bearer ..."
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Modos comparados: el sync con los mismos 3 workers que usaba el Dockerfile
+MODES = [
+    ("sync (3 workers)", ["--worker-class", "sync", "--workers", "3"]),
+    ("gthread (1 worker x 64 threads)", ["--worker-class", "gthread", "--workers", "1", "--threads", "64"]),
+]
+
+
+def app(environ, start_response):
+    """Endpoint I/O-bound simulado: espera como si llamara a una API externa."""
+    time.sleep(float(os.getenv("LOAD_TEST_DELAY", "0.5")))
+    start_response("200 OK", [("Content-Type", "application/json")])
+    return [b'{"ok": true}']
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(worker_args, delay):
+    """Levanta gunicorn con la app de prueba y espera a que acepte conexiones."""
+    port = free_port()
+    env = {**os.environ, "LOAD_TEST_DELAY": str(delay)}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "--chdir", BENCH_DIR, "--bind", f"127.0.0.1:{port}",
+         "--timeout", "120", "--log-level", "warning", *worker_args, "load_test:app"],
+        env=env
+    )
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            return process, f"http://127.0.0.1:{port}/"
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("gunicorn did not start")
+
+
+def run_load(url, total, concurrency, headers=None):
+    """
+    Lanza total peticiones GET con concurrency clientes simultáneos.
+
+    Returns:
+        Diccionario con elapsed, ok, errors, requests_per_second, p50 y p95 (segundos)
+    """
+    def request(_):
+        started = time.time()
+        try:
+            req = urllib.request.Request(url, headers=headers or {})
+            with urllib.request.urlopen(req, timeout=120) as response:
+                response.read()
+            return True, time.time() - started
+        except Exception:
+            return False, time.time() - started
+
+    started = time.time()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(request, range(total)))
+    elapsed = time.time() - started
+
+    latencies = sorted(latency for ok, latency in results if ok)
+    ok = len(latencies)
+
+    def percentile(p):
+        return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))], 3) if latencies else None
+
+    return {
+        "elapsed": round(elapsed, 2),
+        "ok": ok,
+        "errors": total - ok,
+        "requests_per_second": round(ok / elapsed, 2) if elapsed else 0,
+        "p50": percentile(0.5),
+        "p95": percentile(0.95),
+    }
+
+
+def print_result(label, result):
+    print(f"{label:<34} {result['requests_per_second']:>8} req/s  p50 {result['p50']}s  "
+          f"p95 {result['p95']}s  ok {result['ok']}  errors {result['errors']}  ({result['elapsed']}s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--delay", type=float, default=0.5, help="Espera simulada por petición (segundos)")
+    parser.add_argument("--url", help="Medir un servidor ya levantado en lugar de la app de prueba")
+    parser.add_argument("--header", action="append", default=[], help="Header 'Nombre: valor' (repetible)")
+    args = parser.parse_args()
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}")
+
+    if args.url:
+        headers = dict(h.split(":", 1) for h in args.header)
+        headers = {name.strip(): value.strip() for name, value in headers.items()}
+        print_result(args.url, run_load(args.url, args.requests, args.concurrency, headers))
+        return
+
+    print(f"simulated upstream delay {args.delay}s")
+    for label, worker_args in MODES:
+        process, url = start_server(worker_args, args.delay)
+        try:
+            print_result(label, run_load(url, args.requests, args.concurrency))
+        finally:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
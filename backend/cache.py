@@ -0,0 +1,103 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+def credential_key(credential):
+    """
+    Hash estable de una credencial (token o headers) para usarla como parte de una
+    clave de caché sin guardar la credencial en sí.
+    """
+    serialized = json.dumps(credential, sort_keys=True, default=str)
+    return hashlib.sha256(serialized.encode()).hexdigest()
+
+
+class TTLCache:
+    """
+    Caché en memoria con expiración por tiempo y límite de entradas (LRU).
+
+    Es segura para usar desde varios hilos. Los valores guardados se comparten
+    entre lecturas, por lo que no deben modificarse después de set(). Cuenta los
+    aciertos y fallos de get() para reportar su efectividad con stats().
+    """
+
+    def __init__(self, ttl_seconds=300, max_entries=256):
+        """
+        Args:
+            ttl_seconds: Segundos que una entrada permanece válida
+            max_entries: Máximo de entradas; al superarlo se expulsan las menos usadas
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        # Aumenta con cada clear(), para descartar resultados obtenidos antes de invalidar
+        self.generation = 0
+
+    def get(self, key, default=None):
+        """Retorna el valor guardado para key o default si no existe o ya expiró."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if time.time() >= expires_at:
+                del self._entries[key]
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def peek(self, key, default=None):
+        """
+        Como get(), pero sin contar un acierto o fallo ni cambiar el orden LRU: para
+        consultas internas que no deben mezclarse con las estadísticas de los requests.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.time() >= entry[0]:
+                return default
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.generation += 1
+
+    def stats(self):
+        """Entradas actuales, aciertos, fallos y tasa de aciertos de la caché."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0
+            }
+
+    def __contains__(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and time.time() < entry[0]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
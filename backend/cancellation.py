@@ -0,0 +1,66 @@
+import threading
+import time
+
+
+class TransferCancelled(Exception):
+    """Se lanza dentro de los loops de trabajo cuando el job fue cancelado."""
+
+
+class DeadlineExceeded(TransferCancelled):
+    """Se lanza cuando el job superó su tiempo límite."""
+
+
+class CancellationToken:
+    """
+    Token compartido entre el endpoint que cancela y los hilos que trabajan.
+
+    Los loops largos (búsqueda por canción, paginación de Spotify, etapas del pipeline)
+    llaman a raise_if_cancelled() o is_cancelled() en cada iteración, de modo que una
+    cancelación o un deadline vencido detiene el trabajo en el tiempo de una petición.
+    """
+
+    def __init__(self, deadline_seconds=None):
+        """
+        Args:
+            deadline_seconds: Tiempo máximo opcional (en segundos) desde la creación del token
+        """
+        self._event = threading.Event()
+        self.deadline = time.time() + float(deadline_seconds) if deadline_seconds else None
+
+    def cancel(self):
+        """Marca el job como cancelado."""
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    @property
+    def expired(self):
+        return self.deadline is not None and time.time() >= self.deadline
+
+    def is_cancelled(self):
+        """True si el job fue cancelado o superó su deadline."""
+        return self.cancelled or self.expired
+
+    @property
+    def reason(self):
+        """Motivo de la detención ("cancelled", "deadline_exceeded") o None si sigue activo."""
+        if self.cancelled:
+            return "cancelled"
+        if self.expired:
+            return "deadline_exceeded"
+        return None
+
+    def raise_if_cancelled(self):
+        """Lanza TransferCancelled o DeadlineExceeded si el job debe detenerse."""
+        if self.cancelled:
+            raise TransferCancelled("Job cancelled by user")
+        if self.expired:
+            raise DeadlineExceeded("Job deadline exceeded")
+
+    def wait(self, timeout):
+        """Espera hasta timeout segundos o hasta que el job se cancele. Retorna True si se canceló."""
+        if self.deadline is not None:
+            timeout = min(timeout, max(0, self.deadline - time.time()))
+        return self._event.wait(timeout) or self.expired
@@ -0,0 +1,101 @@
+import threading
+
+from cancellation import TransferCancelled
+from retry import classify_error, AUTH
+
+
+# Errores de autenticación consecutivos que abren el circuito y detienen el job
+AUTH_FAILURE_THRESHOLD = 3
+
+
+class CredentialsRejected(TransferCancelled):
+    """
+    Se lanza cuando YouTube Music rechaza la credencial: en la verificación inicial o
+    cuando el circuito se abre. Hereda de TransferCancelled para que los loops de
+    trabajo se detengan igual que con una cancelación.
+    """
+
+
+class CircuitBreaker:
+    """
+    Cuenta errores de autenticación consecutivos de un cliente de YouTube Music.
+
+    Con AUTH_FAILURE_THRESHOLD errores seguidos (401/403) el circuito se abre y toda
+    llamada posterior lanza CredentialsRejected sin salir a la red, en lugar de
+    seguir haciendo una búsqueda fallida por canción. Una llamada exitosa reinicia
+    el conteo; los demás errores (transitorios, no encontrados) no lo modifican.
+    """
+
+    def __init__(self, threshold=AUTH_FAILURE_THRESHOLD):
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self.consecutive_failures = 0
+        self.error = None
+
+    @property
+    def tripped(self):
+        return self.error is not None
+
+    def check(self):
+        """Lanza CredentialsRejected si el circuito está abierto."""
+        if self.error is not None:
+            raise CredentialsRejected(f"YouTube Music rejected the credentials: {str(self.error).strip()}")
+
+    def record_success(self):
+        with self._lock:
+            self.consecutive_failures = 0
+
+    def record_error(self, error):
+        """Registra un error; abre el circuito al llegar al umbral de errores de autenticación."""
+        if classify_error(error) != AUTH:
+            return
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= self.threshold and self.error is None:
+                print(f"Circuit breaker open after {self.consecutive_failures} authentication errors")
+                self.error = error
+
+
+class GuardedYTMusic:
+    """Cliente de YouTube Music cuyas llamadas pasan por un CircuitBreaker."""
+
+    def __init__(self, client, breaker):
+        self._client = client
+        self._breaker = breaker
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if not callable(attr):
+            return attr
+
+        def guarded(*args, **kwargs):
+            self._breaker.check()
+            try:
+                result = attr(*args, **kwargs)
+            except Exception as e:
+                self._breaker.record_error(e)
+                if self._breaker.tripped:
+                    self._breaker.check()
+                raise
+            self._breaker.record_success()
+            return result
+        return guarded
+
+
+def probe_credentials(ytmusic):
+    """
+    Verifica la credencial con una llamada barata (una playlist de la biblioteca)
+    antes de empezar un job.
+
+    Raises:
+        CredentialsRejected si YouTube Music responde con un error de autenticación.
+        Otros errores solo se registran: el job sigue y el breaker decide.
+    """
+    try:
+        ytmusic.get_library_playlists(limit=1)
+    except CredentialsRejected:
+        raise
+    except Exception as e:
+        if classify_error(e) == AUTH:
+            raise CredentialsRejected(f"YouTube Music rejected the credentials: {str(e).strip()}")
+        print(f"Credential probe failed ({str(e).strip()}), continuing")
@@ -1,14 +1,28 @@
-import multiprocessing
+import os
 
 # Server socket
-bind = "0.0.0.0:8080"
-workers = multiprocessing.cpu_count() * 2 + 1
-worker_class = 'sync'
+bind = f"0.0.0.0:{os.getenv('PORT', '8080')}"
+
+# Workers
+# gthread atiende muchas peticiones por proceso con hilos: casi todos los endpoints pasan
+# el tiempo esperando a Spotify o YouTube Music, así que un hilo bloqueado no ocupa un proceso.
+# El progreso de los jobs (transfer_progress, delete_progress) vive en la memoria del proceso,
+# por eso se usa un solo worker por defecto: con varios, un poll de /transfer-status puede
+# llegar a un proceso que no conoce el job.
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+workers = int(os.getenv('GUNICORN_WORKERS', 1))
+threads = int(os.getenv('GUNICORN_THREADS', 64))
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 1000))
 timeout = 900
 
 # Worker settings
-max_requests = 1000
-max_requests_jitter = 50
+# Reciclar el worker cada N requests borra los jobs en memoria (progreso, tokens de
+# cancelación, envíos recientes), corta los hilos de transferencia y eliminación a
+# mitad de camino y detiene la sincronización automática. Con un solo worker los polls
+# de estado alcanzan ese límite en minutos, así que el reciclado queda desactivado (0);
+# con varios workers se mantiene el límite anterior.
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 0 if workers == 1 else 1000))
+max_requests_jitter = 50 if max_requests else 0
 keepalive = 500 
 
 # Logging
@@ -21,4 +35,4 @@ proc_name = 'spotify-ytm-api'
 
 # Production settings
 reload = False
-preload_app = True
\ No newline at end of file
+preload_app = True
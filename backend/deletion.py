@@ -0,0 +1,278 @@
+import json
+import os
+import queue
+import threading
+import time
+
+from cancellation import TransferCancelled
+from retry import call_with_retry, classify_error, http_status, AUTH
+
+
+# Eliminaciones simultáneas por job (cada hilo usa su propio cliente de YouTube Music)
+DELETE_CONCURRENCY = 4
+
+# Pausa compartida por todos los hilos al recibir un 429, duplicada con cada 429 seguido
+RATE_LIMIT_PAUSE_SECONDS = 2
+MAX_RATE_LIMIT_PAUSE_SECONDS = 60
+
+# Intervalo mínimo entre escrituras del checkpoint durante una eliminación (al terminar
+# el job siempre se guarda)
+CHECKPOINT_FLUSH_SECONDS = 5
+
+
+class DeletionCheckpoint:
+    """
+    Playlists ya eliminadas por cuenta de YouTube Music, persistidas en un JSON.
+
+    Si una eliminación se interrumpe (reinicio del servidor, cancelación, errores),
+    el siguiente job de la misma cuenta no vuelve a llamar a delete_playlist para las
+    playlists ya eliminadas (la biblioteca de YouTube Music puede seguir listándolas
+    un rato) y las reporta como eliminadas. Las entradas vencen a los max_age_seconds.
+
+    record() guarda en memoria y escribe el archivo como mucho cada
+    CHECKPOINT_FLUSH_SECONDS; el job llama a flush() al terminar.
+    """
+
+    def __init__(self, path, max_age_seconds=24 * 3600):
+        """
+        Args:
+            path: Archivo JSON donde se guarda el checkpoint (None = solo en memoria)
+            max_age_seconds: Antigüedad máxima de una eliminación registrada
+        """
+        self.path = path
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self._accounts = self._load()
+        self._dirty = False
+        self._last_flush = time.time()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Error reading deletion checkpoint: {e}")
+            return {}
+
+    def flush(self):
+        """Guarda el checkpoint en disco si hubo cambios desde el último guardado."""
+        with self._lock:
+            self._last_flush = time.time()
+            if not self._dirty or not self.path:
+                return
+            serialized = json.dumps(self._accounts)
+            self._dirty = False
+        try:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                f.write(serialized)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Error saving deletion checkpoint: {e}")
+
+    def for_account(self, account):
+        """Vista del checkpoint limitada a una cuenta de YouTube Music."""
+        return AccountDeletionCheckpoint(self, account)
+
+    def deleted(self, account):
+        """Retorna el conjunto de IDs de playlists eliminadas recientemente en la cuenta."""
+        now = time.time()
+        with self._lock:
+            entries = self._accounts.get(account, {})
+            return {pid for pid, deleted_at in entries.items() if now - deleted_at < self.max_age_seconds}
+
+    def record(self, account, playlist_id):
+        """Registra una playlist eliminada; el archivo se escribe como mucho cada CHECKPOINT_FLUSH_SECONDS."""
+        with self._lock:
+            self._accounts.setdefault(account, {})[playlist_id] = time.time()
+            self._dirty = True
+            due = time.time() - self._last_flush >= CHECKPOINT_FLUSH_SECONDS
+        if due:
+            self.flush()
+
+    def forget(self, account, playlist_ids):
+        """
+        Descarta del checkpoint de la cuenta las playlists de un job que terminó completo.
+        Las demás entradas (por ejemplo de otra eliminación interrumpida) se conservan.
+        """
+        with self._lock:
+            entries = self._accounts.get(account)
+            if not entries:
+                return
+            for playlist_id in playlist_ids:
+                entries.pop(playlist_id, None)
+            if not entries:
+                del self._accounts[account]
+            self._dirty = True
+        self.flush()
+
+
+class AccountDeletionCheckpoint:
+    """Checkpoint de una sola cuenta, el que recibe delete_playlists."""
+
+    def __init__(self, checkpoint, account):
+        self.checkpoint = checkpoint
+        self.account = account
+
+    def deleted(self):
+        return self.checkpoint.deleted(self.account)
+
+    def record(self, playlist_id):
+        self.checkpoint.record(self.account, playlist_id)
+
+    def forget(self, playlist_ids):
+        self.checkpoint.forget(self.account, playlist_ids)
+
+    def flush(self):
+        self.checkpoint.flush()
+
+
+class _RateLimit:
+    """Pausa compartida entre los hilos de un job cuando YouTube Music responde 429."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.until = 0.0
+        self.pause = RATE_LIMIT_PAUSE_SECONDS
+        self.hits = 0
+
+    def wait(self, is_cancelled):
+        """Espera a que termine la pausa vigente; retorna False si el job se canceló."""
+        while True:
+            remaining = self.until - time.time()
+            if is_cancelled():
+                return False
+            if remaining <= 0:
+                return True
+            time.sleep(min(remaining, 0.5))
+
+    def penalize(self):
+        with self._lock:
+            self.hits += 1
+            self.until = max(self.until, time.time() + self.pause)
+            print(f"Rate limited by YouTube Music, pausing deletions for {self.pause}s")
+            self.pause = min(self.pause * 2, MAX_RATE_LIMIT_PAUSE_SECONDS)
+
+    def reset(self):
+        with self._lock:
+            self.pause = RATE_LIMIT_PAUSE_SECONDS
+
+
+def delete_playlists(clients, playlists, update_progress, is_cancelled=None, checkpoint=None):
+    """
+    Elimina playlists de YouTube Music con concurrencia acotada.
+
+    Cada cliente de clients atiende una cola compartida en su propio hilo, así que la
+    concurrencia es len(clients). Los errores transitorios se reintentan por playlist
+    (retry.call_with_retry) y un 429 además pausa a todos los hilos con backoff
+    exponencial. Al cancelarse (is_cancelled) los hilos dejan de tomar playlists y las
+    restantes quedan "pending".
+
+    Args:
+        clients: Lista de clientes YTMusic, uno por hilo
+        playlists: Lista de diccionarios con playlistId y name
+        update_progress: Función (índice, estado, deleted=, failed=, **datos) que publica el avance
+        is_cancelled: Función opcional que indica si el job se canceló
+        checkpoint: AccountDeletionCheckpoint opcional para reanudar eliminaciones interrumpidas
+
+    Returns:
+        Diccionario con total_playlists, deleted, failed, resumed y playlists (en el orden recibido)
+    """
+    is_cancelled = is_cancelled or (lambda: False)
+    results = {
+        "total_playlists": len(playlists),
+        "deleted": 0,
+        "failed": 0,
+        "resumed": 0,
+        "playlists": [None] * len(playlists)
+    }
+    lock = threading.Lock()
+    rate_limit = _RateLimit()
+    already_deleted = checkpoint.deleted() if checkpoint is not None else set()
+
+    def finish(index, entry):
+        with lock:
+            results["playlists"][index] = entry
+            if entry["status"] == "deleted":
+                results["deleted"] += 1
+            else:
+                results["failed"] += 1
+            counters = {"deleted": results["deleted"], "failed": results["failed"]}
+        update_progress(index, entry["status"], **counters,
+                        **{key: value for key, value in entry.items() if key != "status"})
+
+    pending = queue.Queue()
+    for index, playlist in enumerate(playlists):
+        playlist_id = playlist.get("playlistId")
+        name = playlist.get("name") or "Unknown"
+        if not playlist_id:
+            print(f"⚠️  Skipping '{name}' - No playlist ID")
+            finish(index, {"name": name, "status": "failed", "reason": "No playlist ID found"})
+        elif playlist_id in already_deleted:
+            results["resumed"] += 1
+            finish(index, {"name": name, "status": "deleted", "playlistId": playlist_id, "resumed": True})
+        else:
+            pending.put((index, playlist_id, name))
+
+    if results["resumed"]:
+        print(f"Resuming deletion: {results['resumed']} playlists were already deleted")
+
+    def delete_one(ytmusic, playlist_id):
+        # Cada intento (también los reintentos) respeta la pausa por 429 vigente
+        if not rate_limit.wait(is_cancelled):
+            raise TransferCancelled("Deletion cancelled")
+        try:
+            return ytmusic.delete_playlist(playlist_id)
+        except Exception as e:
+            if http_status(e) == 429:
+                rate_limit.penalize()
+            raise
+
+    def worker(ytmusic):
+        while True:
+            try:
+                index, playlist_id, name = pending.get_nowait()
+            except queue.Empty:
+                return
+            if is_cancelled():
+                return
+
+            update_progress(index, "deleting")
+            try:
+                call_with_retry(delete_one, ytmusic, playlist_id)
+            except TransferCancelled:
+                update_progress(index, "pending")
+                return
+            except Exception as e:
+                print(f"❌ Error deleting '{name}': {str(e).strip()}")
+                finish(index, {"name": name, "status": "failed", "reason": str(e).strip()})
+                if classify_error(e) == AUTH:
+                    # Con la credencial rechazada el resto fallaría igual: quedan pendientes
+                    return
+                continue
+
+            rate_limit.reset()
+            if checkpoint is not None:
+                checkpoint.record(playlist_id)
+            print(f"✅ Deleted: '{name}'")
+            finish(index, {"name": name, "status": "deleted", "playlistId": playlist_id})
+
+    threads = [threading.Thread(target=worker, args=(client,), daemon=True) for client in clients]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        if checkpoint is not None:
+            checkpoint.flush()
+
+    results["playlists"] = [entry for entry in results["playlists"] if entry is not None]
+    results["rate_limited"] = rate_limit.hits
+    complete = len(results["playlists"]) == len(playlists) and not results["failed"]
+    if checkpoint is not None and complete:
+        # Solo las playlists de este job: otra eliminación interrumpida conserva su avance
+        checkpoint.forget(playlist.get("playlistId") for playlist in playlists if playlist.get("playlistId"))
+    return results
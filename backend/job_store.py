@@ -0,0 +1,323 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import MutableMapping
+
+
+# Solo IDs con estos caracteres se usan como nombre de archivo al volcar a disco
+_SAFE_JOB_ID = re.compile(r"^[A-Za-z0-9_-]+$")
+
+# Cada cuánto se revisan los archivos volcados a disco para borrar los vencidos
+_SPILL_SWEEP_INTERVAL = 60
+
+# Intervalo mínimo entre limpiezas disparadas por lecturas (los polls de estado son frecuentes)
+_READ_PRUNE_INTERVAL = 5
+
+
+class JobProgress:
+    """
+    Progreso de un job, compartido entre el hilo que trabaja y los requests de estado.
+
+    Las escrituras usan copy-on-write: se construye un diccionario nuevo (copiando solo
+    los niveles que cambian) bajo un lock de escritura y se publica reemplazando la
+    referencia. Las lecturas toman la referencia publicada sin lock, por lo que nunca
+    ven un diccionario a medio actualizar ni compiten con el escritor. El JSON del
+    snapshot se serializa una sola vez por versión y se reutiliza en cada poll.
+
+    Los valores entregados a update() no deben modificarse después.
+    """
+
+    def __init__(self, data):
+        self._write_lock = threading.Lock()
+        self._data = dict(data)
+        self._json_cache = None
+        self.version = 0
+
+    def snapshot(self):
+        """Retorna el estado publicado actual. Es inmutable por convención: no modificarlo."""
+        return self._data
+
+    def to_json(self):
+        """Retorna el snapshot serializado, reconstruido solo si cambió desde la última lectura."""
+        data = self._data
+        cached = self._json_cache
+        if cached is not None and cached[0] is data:
+            return cached[1]
+        serialized = json.dumps(data)
+        self._json_cache = (data, serialized)
+        return serialized
+
+    def get(self, key, default=None):
+        return self._data.get(key, default)
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def update(self, **fields):
+        """Actualiza campos de primer nivel del job de forma atómica."""
+        self.update_playlists(None, **fields)
+
+    def update_playlist(self, index, fields, **job_fields):
+        """Actualiza una entrada de "playlists" y campos del job en una sola publicación."""
+        self.update_playlists({index: fields}, **job_fields)
+
+    def update_playlists(self, updates, **job_fields):
+        """
+        Actualiza varias entradas de "playlists" y campos del job en una sola publicación.
+
+        Args:
+            updates: Diccionario {índice: campos} o None
+            job_fields: Campos de primer nivel a actualizar
+        """
+        with self._write_lock:
+            data = dict(self._data)
+            if updates:
+                playlists = list(data.get("playlists", []))
+                for index, fields in updates.items():
+                    if 0 <= index < len(playlists):
+                        playlists[index] = {**playlists[index], **fields}
+                data["playlists"] = playlists
+            data.update(job_fields)
+            self._publish(data)
+
+    def set_playlist(self, index, entry, **job_fields):
+        """
+        Reemplaza una entrada de "playlists" por entry tal cual (sin copiarla), para que
+        los resultados del job y el progreso compartan el mismo diccionario.
+        """
+        with self._write_lock:
+            data = dict(self._data)
+            playlists = list(data.get("playlists", []))
+            if 0 <= index < len(playlists):
+                playlists[index] = entry
+            data["playlists"] = playlists
+            data.update(job_fields)
+            self._publish(data)
+
+    def replace(self, data):
+        """Reemplaza todo el estado del job (por ejemplo con los resultados finales)."""
+        with self._write_lock:
+            self._publish(dict(data))
+
+    def _publish(self, data):
+        self._data = data
+        self.version += 1
+
+
+def summarize_job(snapshot):
+    """
+    Resumen compacto de un job: todos los campos de primer nivel excepto la
+    lista de playlists, que es lo que ocupa casi todo el payload.
+    """
+    return {key: value for key, value in snapshot.items() if key != "playlists"}
+
+
+def _trim_missed(entry, missed_limit):
+    """Recorta las listas de canciones no encontradas de una playlist sin copiar si no hace falta."""
+    trimmed = {
+        key: entry[key][:missed_limit]
+        for key in ("missed_tracks_list", "cached_missed_tracks_list", "failed_tracks_list")
+        if len(entry.get(key) or []) > missed_limit
+    }
+    return {**entry, **trimmed} if trimmed else entry
+
+
+def project_job(snapshot, view=None, fields=None, offset=0, limit=None, missed_limit=None):
+    """
+    Construye una vista reducida de un job para respuestas de estado.
+    
+    Args:
+        snapshot: Snapshot publicado del job (JobProgress.snapshot())
+        view: "summary" para omitir la lista de playlists, "full" o None para incluirla
+        fields: Lista opcional de campos de primer nivel a incluir
+        offset: Índice de la primera playlist a incluir
+        limit: Máximo de playlists a incluir (None = todas desde offset)
+        missed_limit: Máximo de elementos de missed_tracks_list (y de
+            cached_missed_tracks_list y failed_tracks_list) por playlist (None = todos)
+        
+    Returns:
+        Diccionario con la proyección. Si incluye playlists paginadas, agrega
+        "playlists_page" con offset, limit y total.
+    """
+    projected = summarize_job(snapshot) if view == "summary" else dict(snapshot)
+    if fields:
+        projected = {key: value for key, value in projected.items() if key in fields}
+    
+    if "playlists" in projected:
+        playlists = projected["playlists"]
+        total = len(playlists)
+        if offset or limit is not None:
+            end = total if limit is None else offset + limit
+            playlists = playlists[offset:end]
+            projected["playlists_page"] = {"offset": offset, "limit": limit, "total": total}
+        if missed_limit is not None:
+            playlists = [_trim_missed(entry, missed_limit) for entry in playlists]
+        projected["playlists"] = playlists
+    
+    return projected
+
+
+class JobStore(MutableMapping):
+    """
+    Diccionario de progreso de jobs con límite de memoria.
+
+    Se comporta como el diccionario que usaba main.py (job_id -> progreso), pero:
+      - Los jobs terminados se eliminan después de ttl_seconds.
+      - Nunca hay más de max_entries jobs en memoria; al superarlo se expulsan
+        los jobs terminados menos usados recientemente (LRU).
+      - Si spill_dir está configurado, los jobs expulsados se guardan como JSON en disco
+        y se pueden seguir consultando hasta que pasen spill_ttl_seconds.
+
+    Un job cuenta como terminado recién cuando su hilo llama a mark_finished (en su
+    finally), no por su status: "cancelled" se publica mientras el hilo todavía corre.
+    Los jobs en curso nunca se expulsan. Los valores se guardan como JobProgress;
+    asignar un diccionario lo envuelve automáticamente.
+    """
+
+    def __init__(self, name, ttl_seconds=3600, max_entries=100, spill_dir=None, spill_ttl_seconds=7 * 24 * 3600, on_evict=None):
+        """
+        Args:
+            name: Prefijo de los archivos volcados a disco ("transfer", "delete", ...)
+            ttl_seconds: Segundos que un job terminado permanece en memoria
+            max_entries: Máximo de jobs en memoria
+            spill_dir: Directorio opcional para volcar los jobs expulsados
+            spill_ttl_seconds: Segundos que un job volcado permanece en disco
+            on_evict: Función opcional (job_id) llamada cuando un job sale de memoria
+        """
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.spill_dir = spill_dir
+        self.spill_ttl_seconds = spill_ttl_seconds
+        self.on_evict = on_evict
+
+        self._jobs = OrderedDict()
+        self._finished_at = {}
+        self._lock = threading.RLock()
+        self._last_prune = 0
+        self._last_spill_sweep = 0
+
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    def __getitem__(self, job_id):
+        with self._lock:
+            if time.time() - self._last_prune >= _READ_PRUNE_INTERVAL:
+                self.prune()
+            if job_id in self._jobs:
+                self._jobs.move_to_end(job_id)
+                return self._jobs[job_id]
+        spilled = self._load_spilled(job_id)
+        if spilled is None:
+            raise KeyError(job_id)
+        return spilled
+
+    def __setitem__(self, job_id, job):
+        if not isinstance(job, JobProgress):
+            job = JobProgress(job)
+        with self._lock:
+            self._jobs[job_id] = job
+            self._jobs.move_to_end(job_id)
+            self._finished_at.pop(job_id, None)
+            self.prune()
+
+    def __delitem__(self, job_id):
+        with self._lock:
+            del self._jobs[job_id]
+            self._finished_at.pop(job_id, None)
+
+    def __contains__(self, job_id):
+        with self._lock:
+            if job_id in self._jobs:
+                return True
+        path = self._spill_path(job_id)
+        return path is not None and os.path.exists(path)
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._jobs))
+
+    def __len__(self):
+        with self._lock:
+            return len(self._jobs)
+
+    def mark_finished(self, job_id):
+        """Registra que el hilo del job terminó: desde ahora el job puede expirar o ser expulsado."""
+        with self._lock:
+            if job_id in self._jobs:
+                self._finished_at.setdefault(job_id, time.time())
+                self.prune()
+
+    def is_finished(self, job_id):
+        """True si el hilo del job ya terminó (los jobs volcados a disco siempre lo están)."""
+        with self._lock:
+            return job_id not in self._jobs or job_id in self._finished_at
+
+    def prune(self):
+        """Expulsa los jobs terminados vencidos y aplica el límite de entradas (LRU)."""
+        now = time.time()
+        with self._lock:
+            self._last_prune = now
+            for job_id, finished_at in list(self._finished_at.items()):
+                if now - finished_at >= self.ttl_seconds:
+                    self._evict(job_id)
+
+            # OrderedDict mantiene el orden de uso: los primeros son los menos recientes
+            overflow = len(self._jobs) - self.max_entries
+            if overflow > 0:
+                for job_id in [jid for jid in self._jobs if jid in self._finished_at][:overflow]:
+                    self._evict(job_id)
+
+        self._sweep_spilled(now)
+
+    def _evict(self, job_id):
+        job = self._jobs.pop(job_id)
+        self._finished_at.pop(job_id, None)
+        self._spill(job_id, job)
+        if self.on_evict:
+            self.on_evict(job_id)
+
+    def _spill_path(self, job_id):
+        if not self.spill_dir or not isinstance(job_id, str) or not _SAFE_JOB_ID.match(job_id):
+            return None
+        return os.path.join(self.spill_dir, f"{self.name}_{job_id}.json")
+
+    def _spill(self, job_id, job):
+        path = self._spill_path(job_id)
+        if path is None:
+            return
+        try:
+            with open(path, "w") as f:
+                f.write(job.to_json())
+        except Exception as e:
+            print(f"Error spilling job {job_id} to disk: {e}")
+
+    def _load_spilled(self, job_id):
+        path = self._spill_path(job_id)
+        if path is None or not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r") as f:
+                return JobProgress(json.load(f))
+        except Exception as e:
+            print(f"Error reading spilled job {job_id}: {e}")
+            return None
+
+    def _sweep_spilled(self, now):
+        if not self.spill_dir or now - self._last_spill_sweep < _SPILL_SWEEP_INTERVAL:
+            return
+        self._last_spill_sweep = now
+        prefix = f"{self.name}_"
+        try:
+            for filename in os.listdir(self.spill_dir):
+                path = os.path.join(self.spill_dir, filename)
+                if filename.startswith(prefix) and now - os.path.getmtime(path) >= self.spill_ttl_seconds:
+                    os.remove(path)
+        except Exception as e:
+            print(f"Error cleaning spilled jobs: {e}")
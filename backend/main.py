@@ -1,13 +1,24 @@
 from flask import Flask, request, redirect, session, jsonify
 from flask_cors import CORS
-from ytm import create_ytm_playlist, transfer_all_playlists, delete_all_ytm_playlists, transfer_selected_tracks, get_ytm_playlists, delete_selected_ytm_playlists
-from spotify import get_user_playlists, get_playlist_tracks_by_id
+from ytm import create_ytm_playlist, transfer_all_playlists, delete_all_ytm_playlists, transfer_selected_tracks, get_ytm_playlists, delete_selected_ytm_playlists, order_playlists, normalize_priorities, estimate_etas, PLAYLIST_ORDERS
+from spotify import get_user_playlists, get_playlist_tracks_by_id, iter_playlist_tracks_by_id, extract_playlist_id
 import os
+import json
+import hashlib
+import math
 import secrets
 import urllib.parse
 import threading
 import requests
 from dotenv import load_dotenv
+from circuit_breaker import CredentialsRejected
+from cancellation import CancellationToken, TransferCancelled
+from job_store import JobStore, project_job
+from cache import TTLCache, credential_key
+from singleflight import SingleFlight
+from sync_state import SyncState
+from match_cache import MatchCache
+from deletion import DeletionCheckpoint
 from apscheduler.schedulers.background import BackgroundScheduler
 from token_manager import (
     save_spotify_tokens, 
@@ -32,22 +43,379 @@ CORS(app, resources={
     }
 })
 
-# Almacenamiento en memoria del progreso de transferencia
-transfer_progress = {}
+# Retención de jobs terminados: TTL en memoria, máximo de jobs y volcado opcional a disco
+JOB_TTL_SECONDS = int(os.getenv('JOB_TTL_SECONDS', 3600))
+JOB_MAX_ENTRIES = int(os.getenv('JOB_MAX_ENTRIES', 100))
+JOB_SPILL_DIR = os.getenv('JOB_SPILL_DIR')
 
 # Almacenamiento en memoria de transferencias canceladas
 cancelled_transfers = set()
 
-# Almacenamiento en memoria del progreso de eliminación
-delete_progress = {}
+# Almacenamiento en memoria del progreso de transferencia
+transfer_progress = JobStore("transfer", JOB_TTL_SECONDS, JOB_MAX_ENTRIES, JOB_SPILL_DIR,
+                             on_evict=cancelled_transfers.discard)
+
+# Tokens de cancelación de las transferencias en curso (transfer_id -> CancellationToken)
+transfer_tokens = {}
+
+# Jobs enviados por clave de idempotencia o por contenido -> id del job, para no
+# iniciar dos veces el mismo job (doble toque en la app, reintentos del cliente)
+submitted_jobs = TTLCache(JOB_TTL_SECONDS, JOB_MAX_ENTRIES * 4)
+
+# Envíos idénticos concurrentes comparten el mismo inicio de job
+job_submissions = SingleFlight()
+
+# Máximo de jobs que se pueden consultar en una sola llamada a /jobs/status
+MAX_BATCH_STATUS_JOBS = 50
 
 # Almacenamiento en memoria de eliminaciones canceladas
 cancelled_deletions = set()
 
+# Almacenamiento en memoria del progreso de eliminación
+delete_progress = JobStore("delete", JOB_TTL_SECONDS, JOB_MAX_ENTRIES, JOB_SPILL_DIR,
+                           on_evict=cancelled_deletions.discard)
+
+# Caché de las canciones de playlists de Spotify, para servir /playlist-tracks paginado
+# sin volver a descargar la playlist en cada página
+PLAYLIST_TRACKS_CACHE_TTL = int(os.getenv('PLAYLIST_TRACKS_CACHE_TTL', 600))
+playlist_tracks_cache = TTLCache(PLAYLIST_TRACKS_CACHE_TTL, int(os.getenv('PLAYLIST_TRACKS_CACHE_MAX_ENTRIES', 50)))
+
+# Caché de respuestas de /playlists y /ytm-playlists, por credencial
+RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', 300))
+user_playlists_cache = TTLCache(RESPONSE_CACHE_TTL)
+ytm_playlists_cache = TTLCache(RESPONSE_CACHE_TTL)
+
+# Cachés reportadas en /cache/stats y respuestas 304 servidas por cada una
+response_caches = {
+    "playlists": user_playlists_cache,
+    "playlist_tracks": playlist_tracks_cache,
+    "ytm_playlists": ytm_playlists_cache
+}
+not_modified_responses = {name: 0 for name in response_caches}
+_cache_stats_lock = threading.Lock()
+
+# Token requerido por /cache/stats (header "Authorization: Bearer <token>"); sin él el endpoint está desactivado
+CACHE_STATS_TOKEN = os.getenv('CACHE_STATS_TOKEN')
+
+# Descargas en curso: peticiones concurrentes del mismo recurso comparten una sola
+upstream_flights = SingleFlight()
+
+# Tamaño de página por defecto y máximo de /playlist-tracks
+PLAYLIST_TRACKS_PAGE_SIZE = 100
+MAX_PLAYLIST_TRACKS_PAGE_SIZE = 500
+
+# Última sincronización de cada playlist (huella del contenido + playlist de YouTube Music),
+# para no volver a verificar en YouTube Music las playlists que no cambiaron en Spotify
+SYNC_STATE_PATH = os.getenv('SYNC_STATE_PATH', 'sync_state.json')
+SYNC_STATE_MAX_AGE_SECONDS = int(os.getenv('SYNC_STATE_MAX_AGE_SECONDS', 24 * 3600))
+sync_state = SyncState(SYNC_STATE_PATH, SYNC_STATE_MAX_AGE_SECONDS)
+
+# Coincidencias exactas por ISRC -> videoId, compartidas entre todos los usuarios, y
+# canciones no encontradas (se vuelven a buscar con backoff exponencial entre
+# MISS_RECHECK_SECONDS y MAX_MISS_RECHECK_SECONDS)
+MATCH_CACHE_PATH = os.getenv('MATCH_CACHE_PATH', 'match_cache.json')
+MISS_RECHECK_SECONDS = int(os.getenv('MISS_RECHECK_SECONDS', 3600))
+MAX_MISS_RECHECK_SECONDS = int(os.getenv('MAX_MISS_RECHECK_SECONDS', 7 * 24 * 3600))
+match_cache = MatchCache(MATCH_CACHE_PATH, miss_backoff_seconds=MISS_RECHECK_SECONDS,
+                         max_miss_backoff_seconds=MAX_MISS_RECHECK_SECONDS)
+
+# Playlists ya eliminadas por cuenta, para reanudar una eliminación interrumpida
+DELETION_CHECKPOINT_PATH = os.getenv('DELETION_CHECKPOINT_PATH', 'deletion_checkpoint.json')
+deletion_checkpoint = DeletionCheckpoint(DELETION_CHECKPOINT_PATH)
+
 # Scheduler para sincronización automática
 scheduler = BackgroundScheduler()
 auto_sync_enabled = False
 
+# Orden en que la sincronización automática procesa las playlists (ver ytm.order_playlists)
+AUTO_SYNC_ORDER = os.getenv('AUTO_SYNC_ORDER', 'spotify')
+
+# Tiempo máximo opcional (segundos) de cada sincronización automática; se valida con
+# _parse_deadline más abajo y un valor inválido equivale a no tener deadline
+AUTO_SYNC_DEADLINE_SECONDS = os.getenv('AUTO_SYNC_DEADLINE_SECONDS') or None
+
+
+# Parámetros de query que piden una vista reducida del progreso (ver job_store.project_job)
+PROJECTION_PARAMS = ('view', 'fields', 'offset', 'limit', 'missed_limit')
+
+
+def _parse_projection(params):
+    """
+    Lee los parámetros de proyección del progreso desde la query o el body.
+    
+    Returns:
+        Tupla (opciones, error). opciones es None si no se pidió ninguna proyección.
+    """
+    if not any(params.get(name) is not None for name in PROJECTION_PARAMS):
+        return None, None
+    
+    view = params.get('view')
+    if view not in (None, 'summary', 'full'):
+        return None, "view must be 'summary' or 'full'"
+    
+    fields = params.get('fields')
+    if isinstance(fields, str):
+        fields = [field for field in fields.split(',') if field]
+    if fields is not None and (not isinstance(fields, list) or not all(isinstance(field, str) for field in fields)):
+        return None, "fields must be a list of field names or a comma-separated string"
+    
+    try:
+        offset = int(params.get('offset') or 0)
+        limit = int(params['limit']) if params.get('limit') is not None else None
+        missed_limit = int(params['missed_limit']) if params.get('missed_limit') is not None else None
+    except (TypeError, ValueError):
+        return None, "offset, limit and missed_limit must be integers"
+    
+    if offset < 0 or (limit is not None and limit < 0) or (missed_limit is not None and missed_limit < 0):
+        return None, "offset, limit and missed_limit must be non-negative"
+    
+    return {
+        "view": view,
+        "fields": fields,
+        "offset": offset,
+        "limit": limit,
+        "missed_limit": missed_limit
+    }, None
+
+
+def _parse_deadline(value):
+    """
+    Valida deadline_seconds del body de un request de job.
+    
+    Returns:
+        Tupla (segundos, error). segundos es None si no se pidió deadline.
+    """
+    if value is None:
+        return None, None
+    if isinstance(value, bool):
+        return None, "deadline_seconds must be a positive number"
+    try:
+        seconds = float(value)
+    except (TypeError, ValueError):
+        return None, "deadline_seconds must be a positive number"
+    if not math.isfinite(seconds) or seconds <= 0:
+        return None, "deadline_seconds must be a positive number"
+    return seconds, None
+
+
+AUTO_SYNC_DEADLINE_SECONDS, _auto_sync_deadline_error = _parse_deadline(AUTO_SYNC_DEADLINE_SECONDS)
+if _auto_sync_deadline_error:
+    print(f"Warning: invalid AUTO_SYNC_DEADLINE_SECONDS ({_auto_sync_deadline_error}), auto-sync will run without a deadline")
+
+
+def _job_status_response(job, params):
+    """
+    Respuesta de estado de un job. Sin parámetros de proyección devuelve el JSON
+    completo ya serializado; con ellos, solo los campos y la página pedidos.
+    """
+    projection, error = _parse_projection(params)
+    if error:
+        return {"message": error}, 400
+    if projection is None:
+        return app.response_class(job.to_json(), status=200, mimetype='application/json')
+    return project_job(job.snapshot(), **projection), 200
+
+
+def _etag_response(payload, cache_name):
+    """
+    Responde payload como JSON con un ETag fuerte (hash del contenido). Si el cliente
+    envía If-None-Match con ese ETag, responde 304 sin cuerpo.
+    
+    Args:
+        payload: Diccionario a serializar
+        cache_name: Caché de response_caches a la que se atribuye la respuesta 304
+    """
+    body = json.dumps(payload)
+    etag = hashlib.sha256(body.encode()).hexdigest()[:32]
+    
+    if request.if_none_match.contains(etag):
+        with _cache_stats_lock:
+            not_modified_responses[cache_name] += 1
+        response = app.response_class(status=304)
+    else:
+        response = app.response_class(body, status=200, mimetype='application/json')
+    
+    response.set_etag(etag)
+    # El navegador puede guardar la respuesta pero debe revalidarla con el ETag
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def _refresh_requested(data=None):
+    """True si el cliente pidió saltarse la caché (?refresh=1 o "refresh": true en el body)."""
+    return request.args.get('refresh') in ('1', 'true') or bool(data and data.get('refresh'))
+
+
+def _invalidate_ytm_library():
+    """
+    Descarta las playlists de YouTube Music en caché. Los jobs la llaman después de
+    cada playlist creada, actualizada o eliminada (no solo al terminar), para que
+    /ytm-playlists y los nombres de delete-selected no usen la biblioteca anterior.
+    """
+    ytm_playlists_cache.clear()
+
+
+def _account_sync_state(auth_headers):
+    """Estado de sincronización de la cuenta de YouTube Music que usará el request."""
+    return sync_state.for_account(credential_key(_ytm_credential(auth_headers)))
+
+
+def _account_deletion_checkpoint(auth_headers):
+    """Checkpoint de eliminaciones de la cuenta de YouTube Music que usará el request."""
+    return deletion_checkpoint.for_account(credential_key(_ytm_credential(auth_headers)))
+
+
+def _forget_cloned_playlist(playlist_link):
+    """
+    /create reemplaza la playlist de YouTube Music con el mismo nombre por fuera del
+    estado de sincronización: la próxima transferencia debe volver a verificarla.
+    """
+    try:
+        sync_state.forget_spotify_playlists([extract_playlist_id(playlist_link)])
+    except Exception:
+        pass
+
+
+def _fetch_cached(cache_name, key, refresh, fetch, *args):
+    """
+    Lee key de la caché cache_name o, si no está, ejecuta fetch(*args) y guarda el resultado.
+    
+    Las peticiones concurrentes por la misma clave comparten una sola llamada a fetch.
+    Si la caché se invalida mientras la descarga está en curso, el resultado no se guarda
+    y las peticiones posteriores inician una descarga nueva.
+    
+    Args:
+        cache_name: Nombre de la caché en response_caches
+        key: Clave del recurso dentro de la caché
+        refresh: True para ignorar el valor en caché
+        fetch: Función que descarga el recurso
+    """
+    cache = response_caches[cache_name]
+    value = None if refresh else cache.get(key)
+    if value is not None:
+        return value
+    
+    generation = cache.generation
+    
+    def load():
+        result = fetch(*args)
+        if cache.generation == generation:
+            cache.set(key, result)
+        return result
+    
+    return upstream_flights.do((cache_name, key, generation), load)
+
+
+def _cached_playlist_tracks(playlist_id, refresh=False):
+    """Canciones de una playlist desde la caché, descargándolas de Spotify si no están."""
+    return _fetch_cached("playlist_tracks", playlist_id, refresh, get_playlist_tracks_by_id, playlist_id)
+
+
+def _ytm_credential(auth_headers):
+    """Credencial de YouTube Music que usará el request: los headers enviados o los guardados."""
+    return auth_headers or get_youtube_headers() or get_youtube_oauth()
+
+
+def _idempotency_key(data):
+    """Clave de idempotencia del request: header Idempotency-Key o "idempotency_key" en el body."""
+    return request.headers.get('Idempotency-Key') or (data or {}).get('idempotency_key')
+
+
+def _submit_job(kind, store, id_field, credential, content, idempotency_key, start):
+    """
+    Inicia un job solo si no hay uno equivalente; si lo hay, responde con su ID.
+    
+    Un request es duplicado si:
+      - Trae la misma clave de idempotencia que un job anterior de la misma credencial
+        (mientras el job siga guardado), o
+      - Pide exactamente lo mismo (mismo endpoint, credencial y contenido) que un job
+        cuyo hilo todavía está corriendo (aunque ya figure como cancelado).
+    Los requests idénticos que llegan a la vez comparten una sola llamada a start().
+    
+    Args:
+        kind: Nombre del endpoint ("transfer-all", "delete-selected", ...)
+        store: JobStore donde vive el progreso del job
+        id_field: Campo de la respuesta con el ID del job ("transfer_id" o "delete_id")
+        credential: Credenciales del usuario (solo se usa su hash)
+        content: Datos del request que definen el trabajo a realizar
+        idempotency_key: Clave enviada por el cliente o None
+        start: Función que inicia el job y retorna (respuesta, status)
+        
+    Returns:
+        Tupla (respuesta, status). Los duplicados responden 200 con "duplicate": true.
+    """
+    credential_hash = credential_key(credential)
+    idempotency_entry = (kind, credential_hash, idempotency_key) if idempotency_key else None
+    content_entry = (kind, credential_hash, credential_key(content))
+    
+    def existing_job():
+        if idempotency_entry:
+            job_id = submitted_jobs.get(idempotency_entry)
+            if job_id and job_id in store:
+                return job_id
+        job_id = submitted_jobs.get(content_entry)
+        if job_id and job_id in store and not store.is_finished(job_id):
+            return job_id
+        return None
+    
+    def duplicate_response(job_id):
+        # La clave de idempotencia queda asociada al job existente para los reintentos
+        if idempotency_entry:
+            submitted_jobs.set(idempotency_entry, job_id)
+        return {
+            "message": "Job already started",
+            id_field: job_id,
+            "status": store[job_id].get("status"),
+            "duplicate": True
+        }, 200
+    
+    job_id = existing_job()
+    if job_id:
+        return duplicate_response(job_id)
+    
+    started = []
+    
+    def start_once():
+        # Otro request idéntico pudo terminar de iniciar el job mientras tanto
+        job_id = existing_job()
+        if job_id:
+            return duplicate_response(job_id)
+        started.append(True)
+        response, status = start()
+        job_id = response.get(id_field)
+        if job_id:
+            submitted_jobs.set(content_entry, job_id)
+            if idempotency_entry:
+                submitted_jobs.set(idempotency_entry, job_id)
+        return response, status
+    
+    response, status = job_submissions.do(content_entry, start_once)
+    if started or response.get("duplicate"):
+        return response, status
+    
+    # Request concurrente que se unió al inicio de otro: mismo job
+    job_id = response.get(id_field)
+    return duplicate_response(job_id) if job_id else (response, status)
+
+
+def _initial_playlists_progress(playlists):
+    """
+    Construye las entradas iniciales del progreso de una transferencia,
+    incluyendo el ETA estimado (en segundos) de cada playlist.
+    """
+    etas = estimate_etas(playlists)
+    return [
+        {
+            "name": p["name"],
+            "status": "pending",
+            "id": p["id"],
+            "image": p.get("image"),
+            "total_tracks": p.get("total_tracks"),
+            "eta_seconds": eta
+        }
+        for p, eta in zip(playlists, etas)
+    ]
+
 
 @app.route('/auth/google', methods=['POST'])
 def google_auth():
@@ -105,21 +473,98 @@ def google_auth():
 
 @app.route('/create', methods=['POST'])
 def create_playlist():
+    """
+    Clona una playlist de Spotify (por enlace) en YouTube Music.
+    
+    Con "async": true en el body (o ?async=1) la clonación corre en background:
+    responde 202 con un transfer_id y el progreso se consulta en /transfer-status,
+    igual que /transfer-all. Al completarse, el estado incluye "missed_tracks" con
+    el mismo contenido que devuelve el modo síncrono.
+    """
     data = request.get_json()
     playlist_link = data.get('playlist_link')
     auth_headers = data.get('auth_headers')
+    run_async = data.get('async') or request.args.get('async') in ('1', 'true')
     
     # Guardar headers de YouTube Music si se proporcionan
     if auth_headers:
         save_youtube_headers(auth_headers)
     
+    if run_async:
+        deadline_seconds, error = _parse_deadline(data.get('deadline_seconds'))
+        if error:
+            return {"message": error}, 400
+        return _start_create_job(playlist_link, auth_headers, deadline_seconds)
+    
     try:
-        missed_tracks = create_ytm_playlist(playlist_link, auth_headers)
+        missed_tracks = create_ytm_playlist(playlist_link, auth_headers, match_cache=match_cache)
         return {"message": "Playlist created successfully!",
                 "missed_tracks": missed_tracks
         }, 200
+    except CredentialsRejected as e:
+        return {"message": str(e), "error_type": "auth_failed"}, 401
     except Exception as e:
         return {"message": str(e)}, 500
+    finally:
+        _invalidate_ytm_library()
+        _forget_cloned_playlist(playlist_link)
+
+
+def _start_create_job(playlist_link, auth_headers, deadline_seconds=None):
+    """Inicia /create como job en background y responde con su transfer_id."""
+    if not playlist_link:
+        return {"message": "playlist_link is required"}, 400
+    
+    transfer_id = f"create_{secrets.token_urlsafe(12)}"
+    transfer_progress[transfer_id] = {
+        "status": "in_progress",
+        "kind": "create",
+        "total_playlists": 1,
+        "processed": 0,
+        "successful": 0,
+        "failed": 0,
+        "skipped": 0,
+        "playlists": [{"name": playlist_link, "status": "pending", "link": playlist_link}]
+    }
+    
+    cancel_token = CancellationToken(deadline_seconds)
+    transfer_tokens[transfer_id] = cancel_token
+    
+    def create_in_background():
+        try:
+            missed_tracks = create_ytm_playlist(playlist_link, auth_headers, transfer_id, transfer_progress, cancel_token,
+                                                match_cache=match_cache)
+            if transfer_id not in cancelled_transfers:
+                up_to_date = missed_tracks.get("playlist_exists") and not missed_tracks.get("playlist_updated")
+                transfer_progress[transfer_id].update(
+                    status="completed",
+                    processed=1,
+                    successful=0 if up_to_date else 1,
+                    skipped=1 if up_to_date else 0,
+                    missed_tracks=missed_tracks
+                )
+        except CredentialsRejected as e:
+            transfer_progress[transfer_id].update(status="error", error_type="auth_failed", error=str(e), processed=1, failed=1)
+        except TransferCancelled:
+            if transfer_id not in cancelled_transfers:
+                transfer_progress[transfer_id].update(status=cancel_token.reason)
+        except Exception as e:
+            if transfer_id not in cancelled_transfers:
+                transfer_progress[transfer_id].update(status="error", error=str(e), processed=1, failed=1)
+        finally:
+            transfer_tokens.pop(transfer_id, None)
+            _invalidate_ytm_library()
+            _forget_cloned_playlist(playlist_link)
+            transfer_progress.mark_finished(transfer_id)
+    
+    thread = threading.Thread(target=create_in_background)
+    thread.daemon = True
+    thread.start()
+    
+    return {
+        "message": "Playlist creation started",
+        "transfer_id": transfer_id
+    }, 202
 
 
 @app.route('/playlists', methods=['POST'])
@@ -139,12 +584,13 @@ def get_playlists():
         return {"message": "Spotify access token is required"}, 400
     
     try:
-        playlists = get_user_playlists(spotify_token)
-        return {
+        playlists = _fetch_cached("playlists", credential_key(spotify_token), _refresh_requested(data),
+                                  get_user_playlists, spotify_token)
+        return _etag_response({
             "message": "Playlists retrieved successfully",
             "playlists": playlists,
             "count": len(playlists)
-        }, 200
+        }, "playlists")
     except Exception as e:
         return {"message": str(e)}, 500
 
@@ -153,16 +599,96 @@ def get_playlists():
 def get_playlist_tracks(playlist_id):
     """
     Obtiene las canciones de una playlist específica de Spotify.
+    
+    Modos:
+      - Sin parámetros: todas las canciones en una sola respuesta.
+      - ?limit=&cursor=: una página de canciones y next_cursor para pedir la siguiente.
+        Todas las páginas se sirven desde la caché de la playlist, que se descarga
+        de Spotify la primera vez.
+      - ?stream=1 (o Accept: application/x-ndjson): NDJSON con una canción por línea,
+        enviadas a medida que llegan las páginas de Spotify.
+    
+    Las respuestas JSON llevan ETag y responden 304 a If-None-Match. ?refresh=1
+    vuelve a descargar la playlist aunque esté en caché.
     """
+    if request.args.get('stream') in ('1', 'true') or 'application/x-ndjson' in request.headers.get('Accept', ''):
+        return _stream_playlist_tracks(playlist_id)
+    
+    cursor = request.args.get('cursor')
+    limit = request.args.get('limit')
+    
+    if cursor is None and limit is None:
+        try:
+            tracks = _cached_playlist_tracks(playlist_id, _refresh_requested())
+            return _etag_response({
+                "message": "Tracks retrieved successfully",
+                "tracks": tracks,
+                "count": len(tracks)
+            }, "playlist_tracks")
+        except Exception as e:
+            return {"message": str(e)}, 500
+    
     try:
-        tracks = get_playlist_tracks_by_id(playlist_id)
-        return {
-            "message": "Tracks retrieved successfully",
-            "tracks": tracks,
-            "count": len(tracks)
-        }, 200
+        offset = int(cursor) if cursor else 0
+        limit = int(limit) if limit else PLAYLIST_TRACKS_PAGE_SIZE
+    except ValueError:
+        return {"message": "cursor and limit must be integers"}, 400
+    
+    if offset < 0 or limit < 1:
+        return {"message": "cursor must be non-negative and limit positive"}, 400
+    limit = min(limit, MAX_PLAYLIST_TRACKS_PAGE_SIZE)
+    
+    try:
+        # Solo la primera página puede forzar la descarga: los cursores siguen sobre la misma copia
+        tracks = _cached_playlist_tracks(playlist_id, _refresh_requested() and not cursor)
     except Exception as e:
         return {"message": str(e)}, 500
+    
+    page = tracks[offset:offset + limit]
+    end = offset + len(page)
+    
+    return _etag_response({
+        "message": "Tracks retrieved successfully",
+        "tracks": page,
+        "count": len(page),
+        "total": len(tracks),
+        "next_cursor": str(end) if end < len(tracks) else None
+    }, "playlist_tracks")
+
+
+def _stream_playlist_tracks(playlist_id):
+    """
+    Respuesta NDJSON de /playlist-tracks: cada línea es una canción. Si Spotify falla
+    a mitad de la descarga, la última línea es {"error": ...}. Al terminar, la playlist
+    queda en caché para las peticiones paginadas.
+    """
+    cached = None if _refresh_requested() else playlist_tracks_cache.get(playlist_id)
+    if cached is not None:
+        return app.response_class((json.dumps(track) + "\n" for track in cached), status=200, mimetype='application/x-ndjson')
+    
+    pages = iter_playlist_tracks_by_id(playlist_id)
+    
+    # La primera página se pide antes de empezar a responder para poder devolver un error normal
+    try:
+        first_page = next(pages, [])
+    except Exception as e:
+        return {"message": str(e)}, 500
+    
+    def generate():
+        tracks = list(first_page)
+        for track in first_page:
+            yield json.dumps(track) + "\n"
+        try:
+            for page in pages:
+                tracks.extend(page)
+                for track in page:
+                    yield json.dumps(track) + "\n"
+        except Exception as e:
+            yield json.dumps({"error": str(e)}) + "\n"
+            return
+        playlist_tracks_cache.set(playlist_id, tracks)
+    
+    return app.response_class(generate(), status=200, mimetype='application/x-ndjson')
 
 
 @app.route('/transfer-all', methods=['POST'])
@@ -170,11 +696,18 @@ def transfer_all():
     """
     Transfiere todas las playlists de Spotify a YouTube Music.
     Requiere el token de Spotify y autenticación de YouTube Music (headers u OAuth).
+    Un request repetido (misma clave Idempotency-Key o mismo contenido que un job en
+    curso) no inicia otro job: responde con el ID del existente (ver _submit_job).
     """
     data = request.get_json() if request.data else {}
     spotify_token = data.get('spotify_token')
     auth_headers = data.get('auth_headers')
     playlist_ids = data.get('playlist_ids')  # Lista opcional de IDs específicos
+    order = data.get('order', 'spotify')  # smallest_first, largest_first, priority o spotify
+    priorities = data.get('priorities')  # Para order=priority: lista de IDs o {id: prioridad}
+    deadline_seconds, error = _parse_deadline(data.get('deadline_seconds'))  # Tiempo máximo opcional del job
+    if error:
+        return {"message": error}, 400
     
     # Si no se proporciona token, intentar obtenerlo de la sesión
     if not spotify_token:
@@ -183,6 +716,15 @@ def transfer_all():
     if not spotify_token:
         return {"message": "Spotify access token is required"}, 400
     
+    if order and order not in PLAYLIST_ORDERS:
+        return {"message": f"Invalid order '{order}'. Valid options: {', '.join(PLAYLIST_ORDERS)}"}, 400
+    
+    # Validar las prioridades antes de iniciar el job (valores no numéricos no se pueden ordenar)
+    try:
+        normalize_priorities(priorities)
+    except ValueError as e:
+        return {"message": str(e)}, 400
+    
     # Si se proporcionan headers, guardarlos
     if auth_headers:
         save_youtube_headers(auth_headers)
@@ -191,6 +733,16 @@ def transfer_all():
     if not auth_headers and not get_youtube_headers() and not get_youtube_oauth():
          return {"message": "YouTube Music authentication is required"}, 400
     
+    content = {"playlist_ids": playlist_ids, "order": order, "priorities": priorities}
+    return _submit_job(
+        "transfer-all", transfer_progress, "transfer_id",
+        (spotify_token, _ytm_credential(auth_headers)), content, _idempotency_key(data),
+        lambda: _start_transfer_all(spotify_token, auth_headers, playlist_ids, order, priorities, deadline_seconds)
+    )
+
+
+def _start_transfer_all(spotify_token, auth_headers, playlist_ids, order, priorities, deadline_seconds):
+    """Inicia /transfer-all en background y responde con su transfer_id."""
     try:
         # Obtener todas las playlists del usuario
         all_playlists = get_user_playlists(spotify_token)
@@ -204,31 +756,49 @@ def transfer_all():
         if len(playlists) == 0:
             return {"message": "No playlists found in Spotify account"}, 404
         
+        # Aplicar la política de orden antes de iniciar el job
+        try:
+            playlists = order_playlists(playlists, order, priorities)
+        except ValueError as e:
+            return {"message": str(e)}, 400
+        
         # Generar ID único para esta transferencia
         transfer_id = secrets.token_urlsafe(16)
         
         # Inicializar progreso
+        playlists_progress = _initial_playlists_progress(playlists)
         transfer_progress[transfer_id] = {
             "status": "in_progress",
+            "order": order or "spotify",
             "total_playlists": len(playlists),
             "processed": 0,
             "successful": 0,
             "failed": 0,
             "skipped": 0,
-            "playlists": [{"name": p["name"], "status": "pending", "id": p["id"], "image": p.get("image")} for p in playlists]
+            "eta_seconds": playlists_progress[-1]["eta_seconds"],
+            "playlists": playlists_progress
         }
         
+        cancel_token = CancellationToken(deadline_seconds)
+        transfer_tokens[transfer_id] = cancel_token
+        
         # Ejecutar transferencia en background
         def transfer_in_background():
             try:
-                results = transfer_all_playlists(playlists, auth_headers, transfer_id, transfer_progress, cancelled_transfers)
+                results = transfer_all_playlists(playlists, auth_headers, transfer_id, transfer_progress, cancelled_transfers, cancel_token,
+                                                 sync_state=_account_sync_state(auth_headers), match_cache=match_cache,
+                                                 on_library_change=_invalidate_ytm_library)
                 if transfer_id not in cancelled_transfers:
-                    transfer_progress[transfer_id] = results
-                    transfer_progress[transfer_id]["status"] = "completed"
+                    transfer_progress[transfer_id].replace({**results, "status": cancel_token.reason or "completed"})
+            except CredentialsRejected as e:
+                transfer_progress[transfer_id].update(status="error", error_type="auth_failed", error=str(e))
             except Exception as e:
                 if transfer_id not in cancelled_transfers:
-                    transfer_progress[transfer_id]["status"] = "error"
-                    transfer_progress[transfer_id]["error"] = str(e)
+                    transfer_progress[transfer_id].update(status="error", error=str(e))
+            finally:
+                transfer_tokens.pop(transfer_id, None)
+                _invalidate_ytm_library()
+                transfer_progress.mark_finished(transfer_id)
         
         thread = threading.Thread(target=transfer_in_background)
         thread.daemon = True
@@ -237,7 +807,8 @@ def transfer_all():
         return {
             "message": "Transfer started",
             "transfer_id": transfer_id,
-            "total_playlists": len(playlists)
+            "total_playlists": len(playlists),
+            "order": order or "spotify"
         }, 202
     except Exception as e:
         return {"message": str(e)}, 500
@@ -247,11 +818,43 @@ def transfer_all():
 def get_transfer_status(transfer_id):
     """
     Obtiene el estado actual de una transferencia en progreso.
+    
+    Query opcional: view=summary, fields=status,processed,..., offset y limit para
+    paginar las playlists, missed_limit para recortar missed_tracks_list.
     """
     if transfer_id not in transfer_progress:
         return {"message": "Transfer not found"}, 404
     
-    return transfer_progress[transfer_id], 200
+    return _job_status_response(transfer_progress[transfer_id], request.args)
+
+
+@app.route('/transfer-status/<transfer_id>/playlists/<int:index>/missed', methods=['GET'])
+def get_transfer_missed_tracks(transfer_id, index):
+    """
+    Obtiene paginada la lista de canciones no encontradas de una playlist de la transferencia.
+    Query: offset (por defecto 0) y limit (por defecto 100).
+    """
+    if transfer_id not in transfer_progress:
+        return {"message": "Transfer not found"}, 404
+    
+    playlists = transfer_progress[transfer_id].snapshot().get("playlists", [])
+    if index >= len(playlists):
+        return {"message": "Playlist not found in transfer"}, 404
+    
+    try:
+        offset = max(int(request.args.get('offset', 0)), 0)
+        limit = max(int(request.args.get('limit', 100)), 0)
+    except ValueError:
+        return {"message": "offset and limit must be integers"}, 400
+    
+    missed_tracks_list = playlists[index].get("missed_tracks_list") or []
+    return {
+        "name": playlists[index].get("name"),
+        "total": len(missed_tracks_list),
+        "offset": offset,
+        "limit": limit,
+        "tracks": missed_tracks_list[offset:offset + limit]
+    }, 200
 
 
 @app.route('/transfer-cancel/<transfer_id>', methods=['POST'])
@@ -262,9 +865,11 @@ def cancel_transfer(transfer_id):
     if transfer_id not in transfer_progress:
         return {"message": "Transfer not found"}, 404
     
-    # Marcar la transferencia como cancelada
+    # Marcar la transferencia como cancelada y despertar a los loops que la estén procesando
     cancelled_transfers.add(transfer_id)
-    transfer_progress[transfer_id]["status"] = "cancelled"
+    if transfer_id in transfer_tokens:
+        transfer_tokens[transfer_id].cancel()
+    transfer_progress[transfer_id].update(status="cancelled")
     
     return {"message": "Transfer cancelled", "transfer_id": transfer_id}, 200
 
@@ -273,10 +878,15 @@ def cancel_transfer(transfer_id):
 def transfer_selected():
     """
     Transfiere playlists con canciones seleccionadas específicas a YouTube Music.
+    Un request repetido (misma clave Idempotency-Key o mismo contenido que un job en
+    curso) no inicia otro job: responde con el ID del existente (ver _submit_job).
     """
     data = request.get_json() if request.data else {}
     auth_headers = data.get('auth_headers')
     playlists_data = data.get('playlists', [])
+    deadline_seconds, error = _parse_deadline(data.get('deadline_seconds'))  # Tiempo máximo opcional del job
+    if error:
+        return {"message": error}, 400
     
     # Si se proporcionan headers, guardarlos
     if auth_headers:
@@ -289,6 +899,15 @@ def transfer_selected():
     if not playlists_data or len(playlists_data) == 0:
         return {"message": "No playlists with tracks provided"}, 400
     
+    return _submit_job(
+        "transfer-selected", transfer_progress, "transfer_id",
+        _ytm_credential(auth_headers), playlists_data, _idempotency_key(data),
+        lambda: _start_transfer_selected(auth_headers, playlists_data, deadline_seconds)
+    )
+
+
+def _start_transfer_selected(auth_headers, playlists_data, deadline_seconds):
+    """Inicia /transfer-selected en background y responde con su transfer_id."""
     try:
         # Generar ID único para esta transferencia
         transfer_id = secrets.token_urlsafe(16)
@@ -304,17 +923,27 @@ def transfer_selected():
             "playlists": [{"name": p["name"], "status": "pending", "id": p.get("id", ""), "image": p.get("image")} for p in playlists_data]
         }
         
+        cancel_token = CancellationToken(deadline_seconds)
+        transfer_tokens[transfer_id] = cancel_token
+        
         # Ejecutar transferencia en background
         def transfer_in_background():
             try:
-                results = transfer_selected_tracks(playlists_data, auth_headers, transfer_id, transfer_progress, cancelled_transfers)
+                results = transfer_selected_tracks(playlists_data, auth_headers, transfer_id, transfer_progress, cancelled_transfers, cancel_token,
+                                                   match_cache=match_cache, on_library_change=_invalidate_ytm_library)
                 if transfer_id not in cancelled_transfers:
-                    transfer_progress[transfer_id] = results
-                    transfer_progress[transfer_id]["status"] = "completed"
+                    transfer_progress[transfer_id].replace({**results, "status": cancel_token.reason or "completed"})
+            except CredentialsRejected as e:
+                transfer_progress[transfer_id].update(status="error", error_type="auth_failed", error=str(e))
             except Exception as e:
                 if transfer_id not in cancelled_transfers:
-                    transfer_progress[transfer_id]["status"] = "error"
-                    transfer_progress[transfer_id]["error"] = str(e)
+                    transfer_progress[transfer_id].update(status="error", error=str(e))
+            finally:
+                transfer_tokens.pop(transfer_id, None)
+                _invalidate_ytm_library()
+                transfer_progress.mark_finished(transfer_id)
+                # Con una selección parcial la playlist de YouTube Music ya no refleja la de Spotify
+                sync_state.forget_spotify_playlists([p.get("id") for p in playlists_data if p.get("id")])
         
         thread = threading.Thread(target=transfer_in_background)
         thread.daemon = True
@@ -334,6 +963,8 @@ def delete_all_playlists():
     """
     Elimina todas las playlists de YouTube Music del usuario.
     Usa headers guardados o los proporcionados.
+    Un request repetido (misma clave Idempotency-Key o mismo contenido que un job en
+    curso) no inicia otro job: responde con el ID del existente (ver _submit_job).
     """
     global delete_progress
     
@@ -348,6 +979,15 @@ def delete_all_playlists():
     if not auth_headers and not get_youtube_headers() and not get_youtube_oauth():
          return {"message": "YouTube Music authentication is required"}, 400
     
+    return _submit_job(
+        "delete-all", delete_progress, "delete_id",
+        _ytm_credential(auth_headers), {}, _idempotency_key(data),
+        lambda: _start_delete_all(auth_headers)
+    )
+
+
+def _start_delete_all(auth_headers):
+    """Inicia /delete-all-playlists en background y responde con su delete_id."""
     try:
         # Generar ID único para esta eliminación
         delete_id = secrets.token_urlsafe(16)
@@ -364,12 +1004,18 @@ def delete_all_playlists():
         # Ejecutar eliminación en background
         def delete_in_background():
             try:
-                results = delete_all_ytm_playlists(auth_headers, delete_progress, delete_id)
-                delete_progress[delete_id] = results
-                delete_progress[delete_id]["status"] = "completed"
+                results = delete_all_ytm_playlists(auth_headers, delete_progress, delete_id, cancelled_deletions,
+                                                   checkpoint=_account_deletion_checkpoint(auth_headers),
+                                                   on_library_change=_invalidate_ytm_library)
+                if delete_id not in cancelled_deletions:
+                    delete_progress[delete_id].replace({**results, "status": "completed"})
             except Exception as e:
-                delete_progress[delete_id]["status"] = "error"
-                delete_progress[delete_id]["error"] = str(e)
+                if delete_id not in cancelled_deletions:
+                    delete_progress[delete_id].update(status="error", error=str(e))
+            finally:
+                _invalidate_ytm_library()
+                sync_state.clear(credential_key(_ytm_credential(auth_headers)))
+                delete_progress.mark_finished(delete_id)
         
         thread = threading.Thread(target=delete_in_background)
         thread.daemon = True
@@ -387,11 +1033,62 @@ def delete_all_playlists():
 def get_delete_status(delete_id):
     """
     Obtiene el estado actual de una eliminación en progreso.
+    Acepta los mismos parámetros de proyección que /transfer-status.
     """
     if delete_id not in delete_progress:
         return {"message": "Delete operation not found"}, 404
     
-    return delete_progress[delete_id], 200
+    return _job_status_response(delete_progress[delete_id], request.args)
+
+
+@app.route('/jobs/status', methods=['GET', 'POST'])
+def get_jobs_status():
+    """
+    Obtiene el estado de varios jobs (transferencias y eliminaciones) en una sola respuesta.
+    
+    POST: {"job_ids": [...], "view": "summary" | "full", "fields": [...]}
+    GET: /jobs/status?ids=id1,id2&view=summary&fields=status,processed
+    
+    La vista "summary" (por defecto) omite la lista de playlists de cada job.
+    También acepta offset, limit y missed_limit como /transfer-status.
+    """
+    if request.method == 'POST':
+        params = request.get_json(silent=True) or {}
+        job_ids = params.get('job_ids') or []
+    else:
+        params = request.args.to_dict()
+        job_ids = [job_id for job_id in params.get('ids', '').split(',') if job_id]
+    
+    if not isinstance(job_ids, list) or len(job_ids) == 0:
+        return {"message": "job_ids is required"}, 400
+    
+    if len(job_ids) > MAX_BATCH_STATUS_JOBS:
+        return {"message": f"At most {MAX_BATCH_STATUS_JOBS} jobs can be queried at once"}, 400
+    
+    if not all(isinstance(job_id, str) for job_id in job_ids):
+        return {"message": "job_ids must be a list of job IDs"}, 400
+    
+    projection, error = _parse_projection({**params, "view": params.get('view') or 'summary'})
+    if error:
+        return {"message": error}, 400
+    
+    jobs = {}
+    not_found = []
+    for job_id in job_ids:
+        if job_id in transfer_progress:
+            kind, snapshot = "transfer", transfer_progress[job_id].snapshot()
+        elif job_id in delete_progress:
+            kind, snapshot = "delete", delete_progress[job_id].snapshot()
+        else:
+            not_found.append(job_id)
+            continue
+        
+        jobs[job_id] = {"kind": kind, **project_job(snapshot, **projection)}
+    
+    return {
+        "jobs": jobs,
+        "not_found": not_found
+    }, 200
 
 
 @app.route('/delete-cancel/<delete_id>', methods=['POST'])
@@ -403,7 +1100,7 @@ def cancel_deletion(delete_id):
         return {"message": "Delete operation not found"}, 404
     
     cancelled_deletions.add(delete_id)
-    delete_progress[delete_id]["status"] = "cancelled"
+    delete_progress[delete_id].update(status="cancelled")
     
     return {"message": "Deletion cancelled", "delete_id": delete_id}, 200
 
@@ -424,21 +1121,69 @@ def get_ytm_playlists_endpoint():
     if not auth_headers and not get_youtube_headers() and not get_youtube_oauth():
          return {"message": "YouTube Music authentication is required"}, 400
     
+    cache_key = credential_key(_ytm_credential(auth_headers))
+    
     try:
-        playlists = get_ytm_playlists(auth_headers)
-        return {
+        playlists = _fetch_cached("ytm_playlists", cache_key, _refresh_requested(data),
+                                  get_ytm_playlists, auth_headers)
+        return _etag_response({
             "message": "Playlists retrieved successfully",
             "playlists": playlists,
             "count": len(playlists)
-        }, 200
+        }, "ytm_playlists")
     except Exception as e:
         return {"message": str(e)}, 500
 
 
+@app.route('/cache/stats', methods=['GET'])
+def get_cache_stats():
+    """
+    Efectividad de las cachés de los endpoints de lectura.
+    
+    upstream_calls_saved cuenta las descargas completas evitadas (cada una son una
+    o varias peticiones paginadas a Spotify o YouTube Music), por la caché o por
+    compartir una descarga en curso ("coalesced").
+    
+    Requiere "Authorization: Bearer <CACHE_STATS_TOKEN>"; si la variable no está
+    configurada el endpoint responde 404.
+    """
+    if not CACHE_STATS_TOKEN:
+        return {"message": "Not found"}, 404
+    provided = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+    if not secrets.compare_digest(provided.encode(), CACHE_STATS_TOKEN.encode()):
+        return {"message": "Unauthorized"}, 401
+    
+    caches = {}
+    for name, cache in response_caches.items():
+        stats = cache.stats()
+        with _cache_stats_lock:
+            stats["not_modified"] = not_modified_responses[name]
+        stats["upstream_calls_saved"] = stats["hits"]
+        caches[name] = stats
+    
+    hits = sum(stats["hits"] for stats in caches.values())
+    misses = sum(stats["misses"] for stats in caches.values())
+    
+    return {
+        "caches": caches,
+        "coalesced": upstream_flights.stats(),
+        "match_cache": match_cache.stats(),
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+        "upstream_calls_saved": hits + upstream_flights.shared,
+        "not_modified": sum(stats["not_modified"] for stats in caches.values())
+    }, 200
+
+
 @app.route('/delete-selected-playlists', methods=['POST'])
 def delete_selected_playlists():
     """
     Elimina playlists seleccionadas de YouTube Music.
+    Body: {"playlist_ids": [...], "playlists": [{"id", "name", "image"}] opcional con los
+    nombres a mostrar (si falta, se toman de la caché de /ytm-playlists).
+    Un request repetido (misma clave Idempotency-Key o mismo contenido que un job en
+    curso) no inicia otro job: responde con el ID del existente (ver _submit_job).
     """
     global delete_progress
     
@@ -457,6 +1202,36 @@ def delete_selected_playlists():
     if not playlist_ids or len(playlist_ids) == 0:
         return {"message": "No playlists selected for deletion"}, 400
     
+    if not isinstance(playlist_ids, list) or not all(isinstance(playlist_id, str) and playlist_id for playlist_id in playlist_ids):
+        return {"message": "playlist_ids must be a list of playlist IDs"}, 400
+    
+    known_playlists = _known_ytm_playlists(auth_headers, data.get('playlists'))
+    return _submit_job(
+        "delete-selected", delete_progress, "delete_id",
+        _ytm_credential(auth_headers), sorted(playlist_ids), _idempotency_key(data),
+        lambda: _start_delete_selected(auth_headers, playlist_ids, known_playlists)
+    )
+
+
+def _known_ytm_playlists(auth_headers, request_playlists=None):
+    """
+    Nombre e imagen de las playlists de YouTube Music ya conocidas, sin descargar la
+    biblioteca: las que vienen en el request ([{"id", "name", "image"}]) y, para el
+    resto, las de la caché de /ytm-playlists de la cuenta.
+    
+    Returns:
+        Diccionario {ID: {"name", "image"}}
+    """
+    known = {}
+    cached = ytm_playlists_cache.peek(credential_key(_ytm_credential(auth_headers))) or []
+    for playlist in list(cached) + list(request_playlists or []):
+        if isinstance(playlist, dict) and playlist.get("id"):
+            known[playlist["id"]] = {"name": playlist.get("name"), "image": playlist.get("image")}
+    return known
+
+
+def _start_delete_selected(auth_headers, playlist_ids, known_playlists=None):
+    """Inicia /delete-selected-playlists en background y responde con su delete_id."""
     try:
         # Generar ID único para esta eliminación
         delete_id = secrets.token_urlsafe(16)
@@ -473,14 +1248,19 @@ def delete_selected_playlists():
         # Ejecutar eliminación en background
         def delete_in_background():
             try:
-                results = delete_selected_ytm_playlists(auth_headers, playlist_ids, delete_progress, delete_id, cancelled_deletions)
+                results = delete_selected_ytm_playlists(auth_headers, playlist_ids, delete_progress, delete_id, cancelled_deletions,
+                                                        checkpoint=_account_deletion_checkpoint(auth_headers),
+                                                        known_playlists=known_playlists,
+                                                        on_library_change=_invalidate_ytm_library)
                 if delete_id not in cancelled_deletions:
-                    delete_progress[delete_id] = results
-                    delete_progress[delete_id]["status"] = "completed"
+                    delete_progress[delete_id].replace({**results, "status": "completed"})
             except Exception as e:
                 if delete_id not in cancelled_deletions:
-                    delete_progress[delete_id]["status"] = "error"
-                    delete_progress[delete_id]["error"] = str(e)
+                    delete_progress[delete_id].update(status="error", error=str(e))
+            finally:
+                _invalidate_ytm_library()
+                sync_state.forget_ytm_playlists(playlist_ids)
+                delete_progress.mark_finished(delete_id)
         
         thread = threading.Thread(target=delete_in_background)
         thread.daemon = True
@@ -833,25 +1613,45 @@ def auto_sync_playlists():
         
         print(f"Encontradas {len(playlists)} playlists en Spotify")
         
+        playlists = order_playlists(playlists, AUTO_SYNC_ORDER)
+        
         # Generar ID único para esta transferencia
         transfer_id = f"auto_sync_{secrets.token_urlsafe(8)}"
         
         # Inicializar progreso
+        playlists_progress = _initial_playlists_progress(playlists)
         transfer_progress[transfer_id] = {
             "status": "in_progress",
+            "order": AUTO_SYNC_ORDER,
             "total_playlists": len(playlists),
             "processed": 0,
             "successful": 0,
             "failed": 0,
             "skipped": 0,
-            "playlists": [{"name": p["name"], "status": "pending", "id": p["id"], "image": p.get("image")} for p in playlists]
+            "eta_seconds": playlists_progress[-1]["eta_seconds"],
+            "playlists": playlists_progress
         }
         
-        # Ejecutar transferencia
-        results = transfer_all_playlists(playlists, youtube_headers, transfer_id, transfer_progress)
+        cancel_token = CancellationToken(AUTO_SYNC_DEADLINE_SECONDS)
+        transfer_tokens[transfer_id] = cancel_token
         
-        # Actualizar estado final
-        transfer_progress[transfer_id]["status"] = "completed"
+        # Ejecutar transferencia
+        try:
+            results = transfer_all_playlists(playlists, youtube_headers, transfer_id, transfer_progress, cancelled_transfers, cancel_token,
+                                             sync_state=_account_sync_state(youtube_headers), match_cache=match_cache,
+                                             on_library_change=_invalidate_ytm_library)
+            
+            # Actualizar estado final
+            if transfer_id not in cancelled_transfers:
+                transfer_progress[transfer_id].update(status=cancel_token.reason or "completed")
+        except CredentialsRejected as e:
+            transfer_progress[transfer_id].update(status="error", error_type="auth_failed", error=str(e))
+            print(f"Sincronización detenida: {e}")
+            return
+        finally:
+            transfer_tokens.pop(transfer_id, None)
+            _invalidate_ytm_library()
+            transfer_progress.mark_finished(transfer_id)
         
         print(f"Sincronización completada: {results['successful']} exitosas, {results['failed']} fallidas, {results['skipped']} omitidas")
         
@@ -0,0 +1,157 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from normalize import search_query
+
+
+# Prefijo de las entradas negativas (canciones no encontradas)
+MISS_PREFIX = "miss:"
+
+
+class MatchCache:
+    """
+    Caché persistente y global de canciones ya encontradas en YouTube Music.
+
+    Guarda claves exactas de una canción (por ejemplo "isrc:USUM71703861") -> videoId.
+    Una coincidencia por ISRC identifica la grabación, no la cuenta del usuario, por lo
+    que se comparte entre todos los usuarios y transferencias. Se guarda en disco con
+    escritura atómica cuando flush() encuentra cambios pendientes.
+
+    También guarda resultados negativos ("miss:<clave>" -> {"misses", "retry_at"}): una
+    canción que YouTube Music no tiene no se vuelve a buscar hasta retry_at, y cada
+    nueva búsqueda fallida duplica la espera (de miss_backoff_seconds hasta
+    max_miss_backoff_seconds).
+    """
+
+    def __init__(self, path, max_entries=200000, miss_backoff_seconds=3600, max_miss_backoff_seconds=7 * 24 * 3600):
+        """
+        Args:
+            path: Archivo JSON donde se guarda la caché (None = solo en memoria)
+            max_entries: Máximo de entradas; al superarlo se descartan las menos usadas
+            miss_backoff_seconds: Espera antes de volver a buscar una canción no encontrada
+            max_miss_backoff_seconds: Espera máxima entre búsquedas de una canción no encontrada
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.miss_backoff_seconds = miss_backoff_seconds
+        self.max_miss_backoff_seconds = max_miss_backoff_seconds
+        self._entries = OrderedDict(self._load())
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        self.known_miss_hits = 0
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Error reading match cache: {e}")
+            return {}
+
+    def get(self, key):
+        """Retorna el videoId guardado para key o None."""
+        with self._lock:
+            video_id = self._entries.get(key)
+            if video_id is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return video_id
+
+    def set(self, key, video_id):
+        with self._lock:
+            if self._entries.get(key) == video_id:
+                return
+            self._store(key, video_id)
+
+    def _store(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        self._dirty = True
+
+    def known_miss(self, key):
+        """
+        Indica si key es una canción no encontrada cuya próxima búsqueda aún no toca.
+
+        Returns:
+            El timestamp de la próxima búsqueda, o None si hay que buscarla
+        """
+        with self._lock:
+            entry = self._entries.get(MISS_PREFIX + key)
+            if entry is None or time.time() >= entry["retry_at"]:
+                return None
+            self.known_miss_hits += 1
+            return entry["retry_at"]
+
+    def miss_count(self, key):
+        """Búsquedas fallidas registradas para key (0 si no es un resultado negativo), vencido o no."""
+        with self._lock:
+            entry = self._entries.get(MISS_PREFIX + key)
+            return entry["misses"] if entry else 0
+
+    def record_miss(self, key):
+        """Registra una búsqueda fallida de key y programa la siguiente con backoff exponencial."""
+        with self._lock:
+            entry = self._entries.get(MISS_PREFIX + key) or {"misses": 0}
+            misses = entry["misses"] + 1
+            backoff = min(self.miss_backoff_seconds * 2 ** (misses - 1), self.max_miss_backoff_seconds)
+            self._store(MISS_PREFIX + key, {"misses": misses, "retry_at": time.time() + backoff})
+
+    def forget_miss(self, key):
+        """Borra el resultado negativo de key (la canción se encontró)."""
+        with self._lock:
+            if self._entries.pop(MISS_PREFIX + key, None) is not None:
+                self._dirty = True
+
+    def flush(self):
+        """Guarda la caché en disco si hubo cambios desde el último guardado."""
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            snapshot = dict(self._entries)
+            self._dirty = False
+        try:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Error saving match cache: {e}")
+
+    def stats(self):
+        """Entradas, aciertos, fallos y tasa de aciertos de la caché."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "known_misses": sum(1 for key in self._entries if key.startswith(MISS_PREFIX)),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+                "known_miss_hits": self.known_miss_hits
+            }
+
+
+def isrc_key(isrc):
+    """Clave de la caché para un ISRC (sin guiones ni espacios, en mayúsculas)."""
+    return "isrc:" + isrc.replace("-", "").replace(" ", "").upper()
+
+
+def miss_key(track):
+    """
+    Clave del resultado negativo de una canción: su ID de Spotify o, si no tiene,
+    la consulta normalizada con la que se buscó.
+    """
+    return track.id or "text:" + search_query(track)
@@ -0,0 +1,114 @@
+from difflib import SequenceMatcher
+
+from normalize import normalize_title, normalize_artist
+
+
+# Pesos de cada señal en el puntaje final (suman 1)
+TITLE_WEIGHT = 0.5
+ARTIST_WEIGHT = 0.3
+DURATION_WEIGHT = 0.2
+
+# Diferencia de duración (segundos) a partir de la cual la señal de duración vale 0
+DURATION_TOLERANCE_SECONDS = 15
+
+# Similitud mínima de título: por debajo el candidato es otra canción (puntaje 0)
+MIN_TITLE_SIMILARITY = 0.5
+
+# Puntaje mínimo para aceptar un candidato de la búsqueda por texto
+MIN_MATCH_SCORE = 0.5
+
+# Puntaje mínimo para aceptar un candidato de la búsqueda por ISRC (debe ser la misma grabación)
+MIN_ISRC_MATCH_SCORE = 0.75
+
+
+def compact_candidate(result):
+    """
+    Reduce un resultado de búsqueda de YouTube Music a los campos que usa el puntaje,
+    para guardarlo en caché sin el resto de la respuesta (miniaturas, álbum, etc.).
+
+    Returns:
+        Tupla (videoId, título, artistas, duración en segundos o None)
+    """
+    return (
+        result.get("videoId"),
+        result.get("title") or "",
+        tuple(artist.get("name") or "" for artist in result.get("artists") or []),
+        result.get("duration_seconds")
+    )
+
+
+def _similarity(a, b):
+    if not a or not b:
+        return 0.0
+    if a == b:
+        return 1.0
+    if a in b or b in a:
+        return 0.9
+    return SequenceMatcher(None, a, b).ratio()
+
+
+def score_candidates(track, candidates):
+    """
+    Puntúa todos los candidatos de una canción en una sola pasada.
+
+    Las características de la canción (título y artistas normalizados, duración) se
+    calculan una vez para todo el lote; títulos y artistas se comparan ya normalizados
+    (ver normalize.py), así "Song - Remastered 2011" y "Song" tienen similitud 1. Cada candidato recibe un puntaje entre 0 y 1
+    que combina similitud de título, artista en común y diferencia de duración; un
+    título con similitud menor a MIN_TITLE_SIMILARITY da puntaje 0.
+
+    Args:
+        track: Track buscada
+        candidates: Lista de candidatos compactos (ver compact_candidate)
+
+    Returns:
+        Lista de puntajes en el mismo orden que candidates
+    """
+    name = normalize_title(track.name)
+    artists = [normalize_artist(artist) for artist in track.artists]
+    duration = track.duration_ms / 1000 if track.duration_ms else None
+
+    scores = []
+    for video_id, title, candidate_artists, candidate_duration in candidates:
+        if not video_id:
+            scores.append(0.0)
+            continue
+
+        title_score = _similarity(name, normalize_title(title))
+        if title_score < MIN_TITLE_SIMILARITY:
+            scores.append(0.0)
+            continue
+
+        candidate_artists = [normalize_artist(artist) for artist in candidate_artists if artist]
+        if any(artists) and candidate_artists:
+            artist_score = max(_similarity(a, b) for a in artists for b in candidate_artists)
+        else:
+            artist_score = 0.5
+
+        # Sin duración en alguno de los dos lados la señal es neutra
+        if duration and candidate_duration:
+            delta = abs(duration - candidate_duration)
+            duration_score = max(0.0, 1 - delta / DURATION_TOLERANCE_SECONDS)
+        else:
+            duration_score = 0.5
+
+        scores.append(round(
+            TITLE_WEIGHT * title_score + ARTIST_WEIGHT * artist_score + DURATION_WEIGHT * duration_score, 4
+        ))
+    return scores
+
+
+def best_candidate(track, candidates, min_score=MIN_MATCH_SCORE):
+    """
+    Elige el candidato con mayor puntaje.
+
+    Returns:
+        Tupla (videoId, puntaje) o (None, puntaje) si ninguno alcanza min_score
+    """
+    if not candidates:
+        return None, 0.0
+    scores = score_candidates(track, candidates)
+    best = max(range(len(candidates)), key=scores.__getitem__)
+    if scores[best] < min_score:
+        return None, scores[best]
+    return candidates[best][0], scores[best]
@@ -0,0 +1,78 @@
+import sys
+
+
+class Track:
+    """
+    Canción de Spotify en formato compacto.
+
+    Usa __slots__ en lugar de un diccionario por canción, guarda los artistas en una
+    tupla e interna los nombres de artistas y álbumes, que se repiten mucho dentro de
+    una misma biblioteca. Mantiene lectura estilo diccionario (track["name"]) para el
+    código que todavía trata las canciones como diccionarios.
+    """
+
+    __slots__ = ("id", "isrc", "name", "artists", "album", "duration_ms")
+
+    def __init__(self, name, artists, album="", duration_ms=0, id=None, isrc=None):
+        self.id = id
+        self.isrc = isrc
+        self.name = name
+        self.artists = tuple(sys.intern(artist) for artist in artists if artist)
+        self.album = sys.intern(album or "")
+        self.duration_ms = duration_ms or 0
+
+    @classmethod
+    def from_spotify(cls, track):
+        """Construye la canción a partir de un objeto track de la API de Spotify."""
+        return cls(
+            name=track["name"],
+            artists=[artist["name"] for artist in track["artists"]],
+            album=track["album"]["name"],
+            duration_ms=track.get("duration_ms", 0),
+            id=track.get("id"),
+            isrc=(track.get("external_ids") or {}).get("isrc")
+        )
+
+    @classmethod
+    def from_dict(cls, data):
+        """Construye la canción a partir de un diccionario (por ejemplo el body de un request)."""
+        if isinstance(data, cls):
+            return data
+        return cls(
+            name=data.get("name", ""),
+            artists=data.get("artists") or [],
+            album=data.get("album", ""),
+            duration_ms=data.get("duration_ms", 0),
+            id=data.get("id"),
+            isrc=data.get("isrc")
+        )
+
+    @property
+    def main_artist(self):
+        return self.artists[0] if self.artists else ""
+
+    @property
+    def label(self):
+        """Texto "canción artista" usado para buscar y para reportar canciones no encontradas."""
+        return f"{self.name} {self.main_artist}"
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "isrc": self.isrc,
+            "name": self.name,
+            "artists": list(self.artists),
+            "album": self.album,
+            "duration_ms": self.duration_ms
+        }
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key, default) if key in self.__slots__ else default
+
+    def __repr__(self):
+        return f"Track({self.label!r})"
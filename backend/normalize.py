@@ -0,0 +1,124 @@
+import re
+import unicodedata
+
+
+# Variantes tipográficas que Spotify y YouTube Music escriben de forma distinta
+_TYPOGRAPHY = str.maketrans({
+    "‘": "'", "’": "'", "‚": "'", "‛": "'", "´": "'", "`": "'",
+    "“": '"', "”": '"', "„": '"',
+    "‐": "-", "‑": "-", "‒": "-", "–": "-", "—": "-", "―": "-",
+    " ": " ", " ": " ", "​": "",
+})
+
+# Último segmento entre paréntesis/corchetes o tras " - " al final del título
+_TRAILING_SEGMENT = re.compile(r"\s*(?:[\(\[]([^\(\)\[\]]*)[\)\]]|\s-\s+([^\(\)\[\]]+?))\s*$")
+
+# Artistas invitados: "(feat. X)", "(with X)" o " feat. X" sin paréntesis
+_FEATURING = re.compile(r"^(?:feat|ft|featuring|with)\b\.?", re.IGNORECASE)
+_INLINE_FEATURING = re.compile(r"\s+(?:feat|ft|featuring)\.?\s+.*$", re.IGNORECASE)
+
+# Sufijos que no cambian la grabación (remasterizaciones, ediciones, etiquetas de lanzamiento)
+_NOISE_VERSION = re.compile(
+    r"^(?:\d{4}\s+)?(?:digital(?:ly)?\s+)?remaster(?:ed)?(?:\s+(?:version|edition))?(?:\s+\d{4})?$"
+    r"|^(?:\d{4}\s+)?remasterizad[oa](?:\s+\d{4})?$"
+    r"|^(?:\d{4}\s+)?(?:mono|stereo)(?:\s+(?:version|mix))?$"
+    r"|^(?:single|album|radio|original|lp|7\"|12\")\s+(?:version|edit|mix)$"
+    r"|^radio\s+edit$"
+    r"|^(?:explicit|clean|censored)(?:\s+version)?$"
+    r"|^bonus\s+track$"
+    r"|^(?:\d{4}\s+)?(?:deluxe|expanded|anniversary)(?:\s+edition)?$"
+    r"|^from\s+.+$",
+    re.IGNORECASE
+)
+
+# Versiones que sí son otra grabación: se conservan como etiqueta canónica
+# (palabra normalizada del sufijo -> etiqueta)
+_DISTINCT_VERSIONS = {
+    "live": "live", "en vivo": "live", "en directo": "live",
+    "acoustic": "acoustic", "acustico": "acoustic", "acustica": "acoustic",
+    "instrumental": "instrumental", "demo": "demo", "unplugged": "unplugged",
+    "karaoke": "karaoke", "sped up": "sped up", "slowed": "slowed"
+}
+_DISTINCT_VERSION = re.compile(r"\b(" + "|".join(_DISTINCT_VERSIONS) + r")\b")
+
+_NON_ALNUM = re.compile(r"[^\w]+")
+_SPACES = re.compile(r"\s+")
+
+
+def fold(text):
+    """
+    Forma canónica de un texto para comparar: Unicode NFKC, sin tildes, en minúsculas,
+    "&" como "and", sin puntuación y con espacios simples.
+    """
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKC", text).translate(_TYPOGRAPHY)
+    text = "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+    text = text.casefold().replace("&", " and ").replace("'", "")
+    return _SPACES.sub(" ", _NON_ALNUM.sub(" ", text).replace("_", " ")).strip()
+
+
+def _classify_segment(segment):
+    """
+    Clasifica un sufijo del título.
+
+    Returns:
+        "drop" si no cambia la grabación, una etiqueta canónica si es otra versión,
+        o None si es parte del título (por ejemplo "Part 2")
+    """
+    segment = segment.strip()
+    if not segment or _FEATURING.match(segment) or _NOISE_VERSION.match(segment):
+        return "drop"
+    folded = fold(segment)
+    if folded.endswith("mix") and folded != "mix":
+        return folded
+    match = _DISTINCT_VERSION.search(folded)
+    if match:
+        return _DISTINCT_VERSIONS[match.group(1)]
+    return None
+
+
+def normalize_title(title):
+    """
+    Título canónico de una canción para buscar y para claves de caché.
+
+    Elimina artistas invitados y sufijos que no cambian la grabación
+    ("- Remastered 2011", "(Radio Edit)", "(feat. X)") y deja las versiones
+    distintas como una etiqueta fija ("Song - Live at Wembley" -> "song live").
+
+    Args:
+        title: Título tal como viene de Spotify o YouTube Music
+
+    Returns:
+        Título normalizado (minúsculas, sin puntuación)
+    """
+    if not title:
+        return ""
+    text = unicodedata.normalize("NFKC", title).translate(_TYPOGRAPHY)
+    tags = []
+    while True:
+        match = _TRAILING_SEGMENT.search(text)
+        if not match or match.start() == 0:
+            break
+        kind = _classify_segment(match.group(1) or match.group(2) or "")
+        if kind is None:
+            break
+        if kind != "drop":
+            tags.insert(0, kind)
+        text = text[:match.start()]
+    text = _INLINE_FEATURING.sub("", text)
+    return " ".join([fold(text)] + tags).strip()
+
+
+def normalize_artist(artist):
+    """Nombre de artista canónico (sin invitados "feat. X" ni puntuación)."""
+    return fold(_INLINE_FEATURING.sub("", artist or ""))
+
+
+def search_query(track):
+    """
+    Consulta de búsqueda "título artista" normalizada de una canción. Es también la
+    clave de la caché de resultados de búsqueda, por lo que variantes del mismo título
+    ("Song - Remastered 2011", "Song (feat. X)") comparten una sola búsqueda.
+    """
+    return f"{normalize_title(track.name)} {normalize_artist(track.main_artist)}".strip()
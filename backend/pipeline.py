@@ -0,0 +1,95 @@
+import queue
+import threading
+import time
+
+
+# Marca de fin de datos que viaja por las colas entre etapas
+_STOP = object()
+
+
+def run_pipeline(items, stages, queue_size=2, is_cancelled=None, on_error=None, stats=None):
+    """
+    Ejecuta una serie de etapas concurrentes conectadas por colas acotadas.
+
+    Cada etapa corre en su propio hilo y procesa los items en orden (FIFO), por lo que
+    la etapa N puede trabajar sobre un item mientras la etapa N+1 procesa el anterior.
+    Las colas acotadas evitan que una etapa rápida acumule trabajo en memoria.
+
+    Args:
+        items: Iterable con los items de entrada
+        stages: Lista de tuplas (nombre, función). Cada función recibe un item y retorna
+                el item (o uno nuevo) para la siguiente etapa. La última etapa actúa de sumidero.
+        queue_size: Capacidad máxima de cada cola entre etapas
+        is_cancelled: Función opcional; si retorna True se dejan de alimentar items y
+                      las etapas descartan lo que quede en sus colas
+        on_error: Función opcional (item, nombre_etapa, excepción) que retorna el item a
+                  pasar a la siguiente etapa cuando una etapa lanza una excepción
+        stats: Diccionario opcional donde se publican los contadores de cada etapa
+
+    Returns:
+        Diccionario con los contadores por etapa (processed, busy_seconds, items_per_minute)
+    """
+    if stats is None:
+        stats = {}
+    for name, _ in stages:
+        stats[name] = {"processed": 0, "busy_seconds": 0.0, "items_per_minute": 0.0, "queued": 0}
+
+    queues = [queue.Queue(maxsize=queue_size) for _ in stages]
+
+    def cancelled():
+        return bool(is_cancelled and is_cancelled())
+
+    def feed():
+        try:
+            for item in items:
+                if cancelled():
+                    break
+                queues[0].put(item)
+        finally:
+            queues[0].put(_STOP)
+
+    def work(index, name, func):
+        inbox = queues[index]
+        outbox = queues[index + 1] if index + 1 < len(queues) else None
+        counters = stats[name]
+
+        while True:
+            item = inbox.get()
+            counters["queued"] = inbox.qsize()
+            if item is _STOP:
+                if outbox is not None:
+                    outbox.put(_STOP)
+                return
+
+            # Tras una cancelación se sigue drenando la cola para no bloquear a la etapa anterior
+            if cancelled():
+                continue
+
+            started = time.time()
+            try:
+                item = func(item)
+            except Exception as e:
+                if on_error:
+                    item = on_error(item, name, e)
+                else:
+                    print(f"Error in pipeline stage '{name}': {e}")
+                    item = None
+
+            counters["busy_seconds"] = round(counters["busy_seconds"] + time.time() - started, 3)
+            counters["processed"] += 1
+            if counters["busy_seconds"] > 0:
+                counters["items_per_minute"] = round(counters["processed"] * 60 / counters["busy_seconds"], 2)
+
+            if outbox is not None and item is not None:
+                outbox.put(item)
+
+    threads = [threading.Thread(target=feed, daemon=True)]
+    for index, (name, func) in enumerate(stages):
+        threads.append(threading.Thread(target=work, args=(index, name, func), daemon=True, name=f"pipeline-{name}"))
+
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return stats
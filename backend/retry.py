@@ -0,0 +1,160 @@
+import random
+import re
+import socket
+import time
+
+import requests
+from urllib3.exceptions import NewConnectionError
+
+
+# Clases de error (ver classify_error)
+NOT_FOUND = "not_found"
+TRANSIENT = "transient"
+AUTH = "auth"
+FATAL = "fatal"
+
+# Intentos totales de una llamada con errores transitorios y espera entre intentos
+# (backoff exponencial con jitter completo: aleatoria entre 0 y base * 2^intento, acotada)
+RETRY_ATTEMPTS = 3
+RETRY_BASE_DELAY_SECONDS = 0.5
+RETRY_MAX_DELAY_SECONDS = 8
+
+# Códigos HTTP que vale la pena reintentar
+TRANSIENT_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
+AUTH_STATUS_CODES = {401, 403}
+
+# ytmusicapi no adjunta la respuesta: el código solo aparece en el mensaje
+_HTTP_STATUS = re.compile(r"HTTP (\d{3})")
+
+# ytmusicapi sin credencial utilizable ("Please provide authentication before using this function")
+_AUTH_MESSAGE = re.compile(r"provide (?:browser )?authentication", re.IGNORECASE)
+
+
+class NoMatchFound(LookupError):
+    """
+    La búsqueda terminó sin ningún candidato aceptable (el mejor puntuó por debajo del
+    mínimo). Es el único error que cuenta como "no encontrada": KeyError e IndexError,
+    que también son LookupError, suelen venir de una respuesta con forma inesperada.
+    """
+
+
+def http_status(error):
+    """Código HTTP de un error de requests o de ytmusicapi, o None si no tiene."""
+    response = getattr(error, "response", None)
+    if response is not None and getattr(response, "status_code", None):
+        return response.status_code
+    match = _HTTP_STATUS.search(str(error))
+    return int(match.group(1)) if match else None
+
+
+def classify_error(error):
+    """
+    Clasifica un error de una llamada a YouTube Music o Spotify.
+
+    Returns:
+        NOT_FOUND si la búsqueda no tuvo resultados aceptables (NoMatchFound),
+        TRANSIENT si vale la pena reintentar (timeout, conexión, 429, 5xx),
+        AUTH si la credencial no es válida (401, 403) o FATAL en otro caso
+    """
+    if isinstance(error, NoMatchFound):
+        return NOT_FOUND
+    if isinstance(error, (requests.exceptions.Timeout, requests.exceptions.ConnectionError,
+                          socket.timeout, TimeoutError, ConnectionError)):
+        return TRANSIENT
+    status = http_status(error)
+    if status in AUTH_STATUS_CODES or _AUTH_MESSAGE.search(str(error)):
+        return AUTH
+    if status in TRANSIENT_STATUS_CODES:
+        return TRANSIENT
+    return FATAL
+
+
+def request_not_sent(error):
+    """
+    True si el error garantiza que el servidor no aplicó la petición: un 429 (rechazada
+    antes de procesarla) o una conexión que no se pudo establecer. Un timeout o un 5xx
+    no lo garantizan: la petición pudo aplicarse antes de fallar la respuesta.
+    """
+    if http_status(error) == 429:
+        return True
+    if isinstance(error, (requests.exceptions.ConnectTimeout, ConnectionRefusedError)):
+        return True
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(error, requests.exceptions.ConnectionError) and isinstance(reason, NewConnectionError)
+
+
+def _retry_delay(error, attempt, base_delay, max_delay):
+    """Espera antes del siguiente intento: Retry-After si viene en la respuesta, si no backoff con jitter."""
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("Retry-After") if response is not None and response.headers else None
+    if retry_after and retry_after.isdigit():
+        return min(float(retry_after), max_delay)
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+def call_with_retry(func, *args, attempts=RETRY_ATTEMPTS, base_delay=RETRY_BASE_DELAY_SECONDS,
+                    max_delay=RETRY_MAX_DELAY_SECONDS, cancel_token=None, **kwargs):
+    """
+    Ejecuta func(*args, **kwargs) reintentando solo los errores transitorios.
+
+    Args:
+        func: Función a ejecutar
+        attempts: Intentos totales (incluido el primero)
+        base_delay: Espera base del backoff exponencial, en segundos
+        max_delay: Espera máxima entre intentos, en segundos
+        cancel_token: CancellationToken opcional; cortar la espera si el job se cancela
+
+    Returns:
+        El resultado de func
+
+    Raises:
+        El último error si no es transitorio o se agotaron los intentos
+    """
+    for attempt in range(attempts):
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            if attempt == attempts - 1 or classify_error(e) != TRANSIENT:
+                raise
+            delay = _retry_delay(e, attempt, base_delay, max_delay)
+            print(f"Transient error ({str(e).strip()}), retrying in {delay:.1f}s ({attempt + 1}/{attempts - 1})")
+            if cancel_token:
+                if cancel_token.wait(delay):
+                    cancel_token.raise_if_cancelled()
+            else:
+                time.sleep(delay)
+
+
+def call_write_with_retry(func, *args, applied, cancel_token=None, **kwargs):
+    """
+    Ejecuta una escritura no idempotente (crear una playlist, agregarle canciones)
+    reintentando como call_with_retry, pero sin duplicarla: si el error no garantiza
+    que la petición no llegó al servidor (ver request_not_sent), antes de reintentar
+    se llama a applied() para verificar si la escritura ya ocurrió.
+    
+    Args:
+        func: Función que hace la escritura
+        applied: Función sin argumentos que retorna el resultado de la escritura si ya
+                 se aplicó, o None si hay que repetirla
+        cancel_token: CancellationToken opcional; cortar la espera si el job se cancela
+        
+    Returns:
+        El resultado de func, o el de applied() si la escritura ya se había aplicado
+    """
+    uncertain = False
+    
+    def attempt():
+        nonlocal uncertain
+        if uncertain:
+            result = applied()
+            if result is not None:
+                print("Previous write was applied despite the error, not repeating it")
+                return result
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            if classify_error(e) == TRANSIENT and not request_not_sent(e):
+                uncertain = True
+            raise
+    
+    return call_with_retry(attempt, cancel_token=cancel_token)
@@ -0,0 +1,76 @@
+import threading
+
+
+class _Call:
+    """Llamada en curso: los hilos que la comparten esperan a done."""
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalescencia de llamadas idénticas concurrentes.
+
+    Si varios hilos piden la misma clave mientras una llamada está en curso, solo
+    el primero ejecuta la función; los demás esperan y reciben el mismo resultado
+    (o la misma excepción). Una vez terminada, la siguiente petición con esa clave
+    vuelve a ejecutar la función: no guarda resultados, para eso está TTLCache.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executed = 0
+        self.shared = 0
+
+    def do(self, key, func, *args, **kwargs):
+        """
+        Ejecuta func(*args, **kwargs) o se une a la llamada en curso con la misma clave.
+
+        Args:
+            key: Clave que identifica la llamada (debe ser hashable)
+            func: Función a ejecutar
+
+        Returns:
+            El resultado de la llamada compartida
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.executed += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self):
+        """Llamadas ejecutadas y llamadas que reutilizaron una en curso."""
+        with self._lock:
+            return {
+                "executed": self.executed,
+                "shared": self.shared,
+                "in_flight": len(self._calls)
+            }
@@ -1,6 +1,7 @@
 import os
 import requests
 from dotenv import load_dotenv
+from models import Track
 
 load_dotenv()
 
@@ -49,11 +50,7 @@ def get_all_tracks(link, market):
             track = item["track"]
             if not track or track.get("is_local") or track.get("restrictions"):
                 continue
-            all_tracks.append({
-                "name": track["name"],
-                "artists": [artist["name"] for artist in track["artists"]],
-                "album": track["album"]["name"],
-            })
+            all_tracks.append(Track.from_spotify(track))
         url = data.get("next")
         if url == 'null':
             break
@@ -118,13 +115,14 @@ def get_user_playlists(user_access_token):
     return all_playlists
 
 
-def get_playlist_details_by_id(playlist_id, market="IN"):
+def get_playlist_details_by_id(playlist_id, market="IN", cancel_token=None):
     """
     Obtiene los detalles de una playlist específica por su ID.
     
     Args:
         playlist_id: ID de la playlist de Spotify
         market: Código de mercado (por defecto "IN")
+        cancel_token: CancellationToken opcional, verificado antes de cada página
         
     Returns:
         Diccionario con nombre y canciones de la playlist
@@ -156,17 +154,15 @@ def get_playlist_details_by_id(playlist_id, market="IN"):
     all_tracks = []
     
     while tracks_url:
+        if cancel_token:
+            cancel_token.raise_if_cancelled()
         response = requests.get(tracks_url, headers=headers)
         data = response.json()
         for item in data["items"]:
             track = item["track"]
             if not track or track.get("is_local") or track.get("restrictions"):
                 continue
-            all_tracks.append({
-                "name": track["name"],
-                "artists": [artist["name"] for artist in track["artists"]],
-                "album": track["album"]["name"],
-            })
+            all_tracks.append(Track.from_spotify(track))
         tracks_url = data.get("next")
         if tracks_url == 'null':
             break
@@ -178,17 +174,18 @@ def get_playlist_details_by_id(playlist_id, market="IN"):
     }
 
 
-def get_playlist_tracks_by_id(playlist_id, market="IN"):
+def iter_playlist_tracks_by_id(playlist_id, market="IN"):
     """
-    Obtiene solo las canciones de una playlist específica por su ID.
+    Obtiene las canciones de una playlist página por página (100 canciones por
+    petición a Spotify), para poder entregar las primeras antes de tener todas.
     Incluye un índice único para cada track.
     
     Args:
         playlist_id: ID de la playlist de Spotify
         market: Código de mercado (por defecto "IN")
         
-    Returns:
-        Lista de canciones con índice, nombre, artistas y álbum
+    Yields:
+        Listas de canciones con índice, ID de Spotify, ISRC, nombre, artistas, álbum, imagen y duración
     """
     client_id = os.getenv('SPOTIPY_CLIENT_ID')
     client_secret = os.getenv('SPOTIPY_CLIENT_SECRET')
@@ -198,9 +195,7 @@ def get_playlist_tracks_by_id(playlist_id, market="IN"):
         "Authorization": f"Bearer {access_token}"
     }
     
-    # Obtener todas las canciones
     tracks_url = f"https://api.spotify.com/v1/playlists/{playlist_id}/tracks?market={market}&limit=100"
-    all_tracks = []
     track_index = 0
     
     while tracks_url:
@@ -209,6 +204,7 @@ def get_playlist_tracks_by_id(playlist_id, market="IN"):
             raise Exception(f"Failed to get playlist tracks: {response.json()}")
         
         data = response.json()
+        page = []
         for item in data["items"]:
             track = item["track"]
             if not track or track.get("is_local") or track.get("restrictions"):
@@ -219,8 +215,10 @@ def get_playlist_tracks_by_id(playlist_id, market="IN"):
             if track["album"].get("images") and len(track["album"]["images"]) > 0:
                 album_image = track["album"]["images"][-1]["url"]  # Imagen más pequeña
             
-            all_tracks.append({
+            page.append({
                 "index": track_index,
+                "id": track.get("id"),
+                "isrc": (track.get("external_ids") or {}).get("isrc"),
                 "name": track["name"],
                 "artists": [artist["name"] for artist in track["artists"]],
                 "album": track["album"]["name"],
@@ -229,10 +227,26 @@ def get_playlist_tracks_by_id(playlist_id, market="IN"):
             })
             track_index += 1
         
+        yield page
+        
         tracks_url = data.get("next")
         if tracks_url == 'null':
             break
-    
-    return all_tracks
 
 
+def get_playlist_tracks_by_id(playlist_id, market="IN"):
+    """
+    Obtiene solo las canciones de una playlist específica por su ID.
+    Incluye un índice único para cada track.
+    
+    Args:
+        playlist_id: ID de la playlist de Spotify
+        market: Código de mercado (por defecto "IN")
+        
+    Returns:
+        Lista de canciones con índice, nombre, artistas y álbum
+    """
+    all_tracks = []
+    for page in iter_playlist_tracks_by_id(playlist_id, market):
+        all_tracks.extend(page)
+    return all_tracks
@@ -0,0 +1,193 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from models import Track
+
+
+def playlist_fingerprint(name, tracks):
+    """
+    Huella del contenido de una playlist de Spotify: hash del nombre y de la lista
+    ordenada de canciones (ID, nombre, artistas, álbum y duración).
+
+    Args:
+        name: Nombre de la playlist (en YouTube Music se busca por nombre)
+        tracks: Lista de canciones (Track o diccionarios)
+
+    Returns:
+        String hexadecimal con la huella
+    """
+    digest = hashlib.sha256(name.encode())
+    for track in tracks:
+        track = Track.from_dict(track)
+        fields = (track.id or "", track.name, *track.artists, track.album, str(track.duration_ms))
+        digest.update(b"\n" + "\x1f".join(fields).encode())
+    return digest.hexdigest()
+
+
+class SyncState:
+    """
+    Estado de la última sincronización exitosa de cada playlist, persistido en un JSON.
+
+    Para cada cuenta de YouTube Music (hash de la credencial) y playlist de Spotify
+    guarda la huella del contenido sincronizado, el ID de la playlist en YouTube Music,
+    el resultado (canciones encontradas y no encontradas) y el videoId de cada canción
+    encontrada. Si la huella no cambió, la transferencia puede marcar la playlist como
+    al día sin llamar a YouTube Music; si cambió, solo busca las canciones nuevas.
+
+    Las entradas más viejas que max_age_seconds no cuentan como al día, para volver a
+    verificar de vez en cuando playlists que pudieron cambiar fuera de la app. Tanto
+    en ese caso como al invalidar una playlist (forget_*, clear) se siguen reutilizando
+    los videoId de sus canciones: la correspondencia canción -> video no depende de la
+    playlist de YouTube Music.
+
+    record() solo marca el estado como modificado: el archivo se reescribe una vez por
+    job con flush(), como MatchCache, en lugar de una vez por playlist.
+    """
+
+    def __init__(self, path, max_age_seconds=24 * 3600):
+        """
+        Args:
+            path: Archivo JSON donde se guarda el estado
+            max_age_seconds: Antigüedad máxima de una entrada para confiar en ella
+        """
+        self.path = path
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self._accounts = self._load()
+        self._dirty = False
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Error reading sync state: {e}")
+            return {}
+
+    def flush(self):
+        """Guarda el estado en disco si hubo cambios desde el último guardado."""
+        with self._lock:
+            if not self._dirty:
+                return
+            # Se serializa bajo el lock: las entradas anidadas cambian en otros hilos
+            serialized = json.dumps(self._accounts)
+            self._dirty = False
+        # Escritura atómica: un archivo a medio escribir no debe perder todo el estado
+        try:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                f.write(serialized)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Error saving sync state: {e}")
+
+    def for_account(self, account):
+        """Vista del estado limitada a una cuenta de YouTube Music."""
+        return AccountSyncState(self, account)
+
+    def get(self, account, playlist_id):
+        """Retorna la última sincronización de la playlist o None si no hay una reciente."""
+        with self._lock:
+            entry = self._accounts.get(account, {}).get(playlist_id)
+        if entry is None or "fingerprint" not in entry:
+            return None
+        if time.time() - entry.get("synced_at", 0) >= self.max_age_seconds:
+            return None
+        return entry
+
+    def video_ids(self, account, playlist_id):
+        """
+        Retorna una copia del mapa {ID de canción de Spotify: videoId} de la última
+        sincronización de la playlist, sin importar su antigüedad.
+        """
+        with self._lock:
+            entry = self._accounts.get(account, {}).get(playlist_id) or {}
+            return dict(entry.get("video_ids") or {})
+
+    def record(self, account, playlist_id, fingerprint, result, video_ids=None):
+        """
+        Guarda en memoria el resultado de una sincronización exitosa (ver flush).
+
+        Args:
+            account: Hash de la credencial de YouTube Music
+            playlist_id: ID de la playlist de Spotify
+            fingerprint: Huella del contenido sincronizado (ver playlist_fingerprint)
+            result: Resultado de la playlist con playlist_id de YouTube Music y contadores
+            video_ids: Diccionario opcional {ID de canción de Spotify: videoId}
+        """
+        entry = {
+            "fingerprint": fingerprint,
+            "playlist_id": result["playlist_id"],
+            "name": result.get("name"),
+            "total_tracks": result.get("total_tracks"),
+            "found_tracks": result.get("found_tracks"),
+            "missed_tracks": result.get("missed_tracks", 0),
+            "missed_tracks_list": result.get("missed_tracks_list", []),
+            "cached_missed_tracks_list": result.get("cached_missed_tracks_list", []),
+            "video_ids": video_ids or {},
+            "synced_at": time.time()
+        }
+        with self._lock:
+            self._accounts.setdefault(account, {})[playlist_id] = entry
+            self._dirty = True
+
+    def forget_spotify_playlists(self, playlist_ids):
+        """Invalida la última sincronización de playlists de Spotify en todas las cuentas."""
+        playlist_ids = set(playlist_ids)
+        with self._lock:
+            for playlists in self._accounts.values():
+                for playlist_id in playlist_ids & playlists.keys():
+                    _invalidate(playlists, playlist_id)
+            self._dirty = True
+        self.flush()
+
+    def forget_ytm_playlists(self, ytm_playlist_ids):
+        """Invalida las playlists sincronizadas con estas playlists de YouTube Music."""
+        ytm_playlist_ids = set(ytm_playlist_ids)
+        with self._lock:
+            for playlists in self._accounts.values():
+                for playlist_id, entry in list(playlists.items()):
+                    if entry.get("playlist_id") in ytm_playlist_ids:
+                        _invalidate(playlists, playlist_id)
+            self._dirty = True
+        self.flush()
+
+    def clear(self, account=None):
+        """Invalida todas las playlists de una cuenta, o de todas si account es None."""
+        with self._lock:
+            for name, playlists in self._accounts.items():
+                if account is None or name == account:
+                    for playlist_id in list(playlists):
+                        _invalidate(playlists, playlist_id)
+            self._dirty = True
+        self.flush()
+
+
+def _invalidate(playlists, playlist_id):
+    """Deja de la entrada solo los videoId de sus canciones."""
+    playlists[playlist_id] = {"video_ids": playlists[playlist_id].get("video_ids") or {}}
+
+
+class AccountSyncState:
+    """Estado de sincronización de una sola cuenta, el que reciben las funciones de ytm.py."""
+
+    def __init__(self, state, account):
+        self.state = state
+        self.account = account
+
+    def get(self, playlist_id):
+        return self.state.get(self.account, playlist_id)
+
+    def video_ids(self, playlist_id):
+        return self.state.video_ids(self.account, playlist_id)
+
+    def record(self, playlist_id, fingerprint, result, video_ids=None):
+        self.state.record(self.account, playlist_id, fingerprint, result, video_ids)
+
+    def flush(self):
+        self.state.flush()
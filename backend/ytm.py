@@ -1,6 +1,133 @@
+import math
+import os
+import re
+import time
 from ytmusicapi import YTMusic
 import ytmusicapi
 from spotify import get_all_tracks, get_playlist_name, get_playlist_details_by_id
+from pipeline import run_pipeline
+from cancellation import TransferCancelled
+from models import Track
+from sync_state import playlist_fingerprint
+from match_cache import isrc_key, miss_key
+from matching import compact_candidate, best_candidate, MIN_ISRC_MATCH_SCORE
+from normalize import search_query
+from cache import TTLCache
+from retry import call_with_retry, call_write_with_retry, classify_error, NoMatchFound, FATAL
+from circuit_breaker import CircuitBreaker, GuardedYTMusic, CredentialsRejected, probe_credentials
+from deletion import delete_playlists, DELETE_CONCURRENCY
+
+
+# Estimación inicial de segundos por canción antes de tener mediciones reales del job
+DEFAULT_SECONDS_PER_TRACK = 0.5
+
+# Costo fijo de cada playlist (detalles, verificación y creación) en canciones equivalentes
+PLAYLIST_OVERHEAD_TRACKS = 5
+
+# Políticas de orden soportadas por transfer_all_playlists
+PLAYLIST_ORDERS = ("spotify", "smallest_first", "largest_first", "priority")
+
+# Capacidad de las colas entre etapas del pipeline de transfer_all_playlists
+PIPELINE_QUEUE_SIZE = 2
+
+# Cada cuántas canciones get_video_ids reporta su avance
+SEARCH_PROGRESS_EVERY = 25
+
+# Canciones por llamada al crear una playlist: se crea con el primer bloque y el resto se
+# agrega con add_playlist_items, reintentando cada bloque por separado
+PLAYLIST_CHUNK_SIZE = int(os.getenv("PLAYLIST_CHUNK_SIZE", 200))
+
+# Máximo de canciones de una playlist de YouTube Music; las más grandes se dividen en partes
+MAX_PLAYLIST_TRACKS = int(os.getenv("MAX_PLAYLIST_TRACKS", 5000))
+
+# Cantidad de resultados de cada búsqueda que se puntúan (ver matching.score_candidates)
+SEARCH_CANDIDATES = 5
+
+# Resultados de búsqueda ya obtenidos (consulta normalizada -> candidatos compactos), para
+# volver a elegir la coincidencia de una canción sin repetir la búsqueda en YouTube Music
+candidate_cache = TTLCache(ttl_seconds=24 * 3600, max_entries=50000)
+
+
+def order_playlists(playlists, order="spotify", priorities=None):
+    """
+    Ordena las playlists antes de iniciar la transferencia.
+    
+    Args:
+        playlists: Lista de playlists (cada item con id y total_tracks)
+        order: "spotify" (orden original), "smallest_first", "largest_first" o "priority"
+        priorities: Para "priority", lista de IDs en el orden deseado o diccionario
+                    {id: prioridad} donde un número menor se procesa antes
+        
+    Returns:
+        Nueva lista ordenada. El orden es estable: los empates conservan el orden de Spotify.
+    """
+    if not order or order == "spotify":
+        return list(playlists)
+    
+    if order not in PLAYLIST_ORDERS:
+        raise ValueError(f"Invalid order '{order}'. Valid options: {', '.join(PLAYLIST_ORDERS)}")
+    
+    if order == "smallest_first":
+        return sorted(playlists, key=lambda p: p.get("total_tracks") or 0)
+    
+    if order == "largest_first":
+        return sorted(playlists, key=lambda p: p.get("total_tracks") or 0, reverse=True)
+    
+    # Prioridad del usuario: las playlists sin prioridad van al final
+    priorities = normalize_priorities(priorities)
+    return sorted(playlists, key=lambda p: priorities.get(p.get("id"), float("inf")))
+
+
+def normalize_priorities(priorities):
+    """
+    Convierte las prioridades recibidas en el request a {id: prioridad numérica}.
+    
+    Args:
+        priorities: Lista de IDs en el orden deseado, diccionario {id: prioridad} o None
+        
+    Returns:
+        Diccionario {id: float}
+        
+    Raises:
+        ValueError si no es una lista de IDs ni un diccionario con valores numéricos
+    """
+    if not priorities:
+        return {}
+    if isinstance(priorities, list):
+        if not all(isinstance(playlist_id, str) for playlist_id in priorities):
+            raise ValueError("priorities must be a list of playlist IDs")
+        return {playlist_id: position for position, playlist_id in enumerate(priorities)}
+    if not isinstance(priorities, dict):
+        raise ValueError("priorities must be a list of playlist IDs or an {id: priority} object")
+    normalized = {}
+    for playlist_id, value in priorities.items():
+        try:
+            normalized[playlist_id] = float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Priority for playlist '{playlist_id}' must be a number")
+        if math.isnan(normalized[playlist_id]):
+            raise ValueError(f"Priority for playlist '{playlist_id}' must be a number")
+    return normalized
+
+
+def playlist_cost(playlist):
+    """Costo estimado de transferir una playlist, en canciones equivalentes."""
+    return (playlist.get("total_tracks") or 0) + PLAYLIST_OVERHEAD_TRACKS
+
+
+def estimate_etas(playlists, seconds_per_track=DEFAULT_SECONDS_PER_TRACK):
+    """
+    Estima en cuántos segundos terminará cada playlist si se procesan en el orden dado.
+    
+    Returns:
+        Lista con el ETA acumulado (segundos) de cada playlist
+    """
+    etas = []
+    elapsed = 0
+    for playlist in playlists:
+        elapsed += playlist_cost(playlist) * seconds_per_track
+        etas.append(round(elapsed))
+    return etas
 
 
 def check_playlist_exists(ytmusic, playlist_name):
@@ -73,24 +200,306 @@ def playlists_are_different(existing_video_ids, new_video_ids):
     return False
 
 
-def get_video_ids(ytmusic,tracks):
+def playlist_part_name(name, part):
+    """Nombre de la parte part (desde 1) de una playlist dividida; la primera conserva el nombre."""
+    return name if part == 1 else f"{name} (Part {part})"
+
+
+def create_playlist_chunked(ytmusic, name, video_ids, cancel_token=None, on_progress=None,
+                            chunk_size=PLAYLIST_CHUNK_SIZE, max_tracks=MAX_PLAYLIST_TRACKS):
+    """
+    Crea una playlist privada por bloques en lugar de enviar todos los videoId en una
+    sola llamada: la playlist se crea con el primer bloque y el resto se agrega con
+    add_playlist_items. Cada llamada se reintenta por separado ante errores
+    transitorios, así un fallo no repite toda la playlist.
+    
+    Ninguna de las dos llamadas es idempotente, por eso se reintentan con
+    retry.call_write_with_retry: tras un timeout o un 5xx (la petición pudo aplicarse)
+    primero se verifica si la playlist ya existe con ese nombre y ese contenido, o si
+    el bloque ya se agregó, antes de repetir la llamada.
+    
+    Si hay más de max_tracks canciones se crean varias playlists numeradas
+    ("Nombre", "Nombre (Part 2)", ...).
+    
+    Args:
+        ytmusic: Cliente de YouTube Music
+        name: Nombre de la playlist
+        video_ids: Lista de videoId en orden
+        cancel_token: CancellationToken opcional, verificado entre bloques
+        on_progress: Función opcional (canciones_escritas, total) llamada tras cada bloque
+        
+    Returns:
+        Lista con los IDs de las playlists creadas, una por parte
+    """
+    parts = [video_ids[start:start + max_tracks] for start in range(0, len(video_ids), max_tracks)] or [[]]
+    if len(parts) > 1:
+        print(f"Playlist '{name}' has {len(video_ids)} songs, splitting into {len(parts)} parts")
+    
+    playlist_ids = []
+    written = 0
+    for part, part_video_ids in enumerate(parts, start=1):
+        title = playlist_part_name(name, part)
+        chunks = [part_video_ids[start:start + chunk_size] for start in range(0, len(part_video_ids), chunk_size)] or [[]]
+        playlist_id = call_write_with_retry(
+            ytmusic.create_playlist, title, "", "PRIVATE", chunks[0],
+            applied=lambda: find_playlist_with_tracks(ytmusic, title, chunks[0]),
+            cancel_token=cancel_token
+        )
+        if not isinstance(playlist_id, str):
+            raise Exception(f"Failed to create playlist '{title}': {playlist_id}")
+        playlist_ids.append(playlist_id)
+        part_written = len(chunks[0])
+        written += part_written
+        if on_progress:
+            on_progress(written, len(video_ids))
+        
+        for chunk in chunks[1:]:
+            if cancel_token:
+                cancel_token.raise_if_cancelled()
+            # add_playlist_items aplica el bloque completo o nada: si la playlist ya tiene
+            # más canciones que antes de la llamada, el bloque se agregó
+            response = call_write_with_retry(
+                ytmusic.add_playlist_items, playlist_id, chunk, duplicates=True,
+                applied=lambda before=part_written: (
+                    {"status": "STATUS_SUCCEEDED"} if playlist_track_count(ytmusic, playlist_id) > before else None),
+                cancel_token=cancel_token
+            )
+            if isinstance(response, dict) and response.get("status") not in (None, "STATUS_SUCCEEDED"):
+                raise Exception(f"Failed to add songs to playlist '{title}': {response.get('status')}")
+            part_written += len(chunk)
+            written += len(chunk)
+            if on_progress:
+                on_progress(written, len(video_ids))
+    return playlist_ids
+
+
+def playlist_track_count(ytmusic, playlist_id):
+    """Cantidad de canciones de una playlist (trackCount del encabezado o, si falta, contándolas)."""
+    count = (ytmusic.get_playlist(playlist_id, limit=1) or {}).get("trackCount")
+    if count is None:
+        count = len((ytmusic.get_playlist(playlist_id, limit=None) or {}).get("tracks") or [])
+    return count
+
+
+def find_playlist_with_tracks(ytmusic, title, video_ids):
+    """
+    Busca en la biblioteca una playlist con exactamente ese título y esos videoId, para
+    saber si un create_playlist que falló con un error ambiguo en realidad se aplicó.
+    Compara el contenido y no solo el nombre porque una playlist recién eliminada
+    (la versión anterior al actualizar) puede seguir listada un rato.
+    
+    Returns:
+        El ID de la playlist o None si no existe
+    """
+    for playlist in ytmusic.get_library_playlists(limit=None) or []:
+        if (playlist or {}).get("title") != title or not playlist.get("playlistId"):
+            continue
+        count = playlist.get("count")
+        if isinstance(count, int) and count != len(video_ids):
+            continue
+        tracks = (ytmusic.get_playlist(playlist["playlistId"], limit=None) or {}).get("tracks") or []
+        if [track.get("videoId") for track in tracks] == list(video_ids):
+            return playlist["playlistId"]
+    return None
+
+
+def set_playlist_ids(playlist_result, playlist_ids):
+    """Guarda en el resultado el ID de la playlist y, si se dividió, los IDs de todas sus partes."""
+    playlist_result["playlist_id"] = playlist_ids[0]
+    if len(playlist_ids) > 1:
+        playlist_result["playlist_parts"] = playlist_ids
+
+
+def delete_playlist_parts(ytmusic, name):
+    """
+    Elimina las partes numeradas de una versión anterior de la playlist: solo las que se
+    llaman exactamente playlist_part_name(name, n) con n >= 2, no cualquier playlist
+    cuyo nombre empiece igual.
+    """
+    part_title = re.compile(re.escape(name) + r" \(Part ([1-9][0-9]*)\)")
+    try:
+        playlists = ytmusic.get_library_playlists(limit=None) or []
+        for playlist in playlists:
+            title = (playlist or {}).get("title", "")
+            match = part_title.fullmatch(title)
+            if match and int(match.group(1)) >= 2 and playlist.get("playlistId"):
+                ytmusic.delete_playlist(playlist["playlistId"])
+                print(f"Old playlist part '{title}' deleted")
+    except Exception as e:
+        print(f"Error deleting old playlist parts: {e}")
+
+
+def search_candidates(ytmusic, query, cancel_token=None, refresh=False):
+    """
+    Busca query entre las canciones de YouTube Music y retorna los primeros
+    SEARCH_CANDIDATES resultados compactos. Usa candidate_cache, de modo que volver
+    a buscar la misma consulta no hace otra llamada de red. Los errores transitorios
+    (timeout, 429, 5xx) se reintentan con retry.call_with_retry.
+    
+    Las búsquedas sin resultados no se guardan en candidate_cache: de eso se encarga
+    el resultado negativo de MatchCache, con su propio backoff. Con refresh=True (la
+    nueva verificación de una canción no encontrada) se ignora la caché.
+    """
+    candidates = None if refresh else candidate_cache.get(query)
+    if candidates is None:
+        results = call_with_retry(ytmusic.search, query, filter="songs", cancel_token=cancel_token) or []
+        candidates = [compact_candidate(result) for result in results[:SEARCH_CANDIDATES]]
+        if candidates:
+            candidate_cache.set(query, candidates)
+    return candidates
+
+
+def search_by_isrc(ytmusic, track, match_cache=None, cancel_token=None):
+    """
+    Busca una canción por su ISRC: primero en la caché global de coincidencias y luego
+    en YouTube Music usando el ISRC como consulta. Solo acepta un resultado si su puntaje
+    (título, artista y duración) alcanza MIN_ISRC_MATCH_SCORE.
+    
+    Un ISRC sin coincidencia queda registrado en match_cache como resultado negativo
+    (MatchCache.record_miss), así la búsqueda por ISRC no se repite en cada
+    transferencia sino con backoff exponencial.
+    
+    Returns:
+        videoId o None si la canción no tiene ISRC o no hubo coincidencia exacta
+    
+    Raises:
+        Los errores transitorios (ya reintentados) y de autenticación, para que la
+        canción cuente como fallida y no como no encontrada
+    """
+    if not track.isrc:
+        return None
+    
+    key = isrc_key(track.isrc)
+    if match_cache is not None:
+        video_id = match_cache.get(key)
+        if video_id:
+            return video_id
+        if match_cache.known_miss(key):
+            return None
+    
+    # Si el ISRC ya figuraba sin coincidencia, esta es su nueva verificación: sin caché
+    refresh = match_cache is not None and match_cache.miss_count(key) > 0
+    
+    try:
+        candidates = search_candidates(ytmusic, track.isrc, cancel_token, refresh)
+    except TransferCancelled:
+        raise
+    except Exception as e:
+        if classify_error(e) != FATAL:
+            raise
+        print(f"ISRC search failed for {track.label}: {e}")
+        return None
+    
+    video_id, _ = best_candidate(track, candidates, MIN_ISRC_MATCH_SCORE)
+    if match_cache is not None:
+        if video_id:
+            match_cache.set(key, video_id)
+            match_cache.forget_miss(key)
+        else:
+            match_cache.record_miss(key)
+    return video_id
+
+
+def get_video_ids(ytmusic, tracks, cancel_token=None, on_progress=None, video_id_map=None, match_cache=None):
+    """
+    Busca cada canción en YouTube Music y retorna sus video IDs.
+    Si se proporciona cancel_token, se verifica antes de cada búsqueda y se lanza
+    TransferCancelled apenas el job se cancela o vence su deadline.
+    Si se proporciona on_progress(buscadas, total), se llama cada SEARCH_PROGRESS_EVERY canciones.
+    Si se proporciona video_id_map ({ID de Spotify: videoId}, por ejemplo de la última
+    sincronización), las canciones que ya están en él no se buscan; las encontradas
+    se agregan al diccionario.
+    
+    Las canciones con ISRC se buscan primero por ISRC (ver search_by_isrc, usando la
+    MatchCache global si se proporciona); la búsqueda por "nombre artista" queda como
+    respaldo, con la consulta normalizada de normalize.search_query. En ambos casos
+    se elige el mejor candidato según matching.score_candidates, no el primer
+    resultado, y una canción sin candidato suficientemente parecido cuenta como no
+    encontrada.
+    
+    Con match_cache, una canción no encontrada queda registrada como resultado negativo
+    y no se vuelve a buscar hasta su próxima verificación (backoff exponencial, ver
+    MatchCache.record_miss). Esas canciones cuentan como no encontradas y además se
+    listan en missed_tracks["cached_tracks"].
+    
+    Los errores de búsqueda se clasifican con retry.classify_error: los transitorios se
+    reintentan y, si se agotan los intentos o el error es de otro tipo, la canción no
+    cuenta como no encontrada sino como fallida (missed_tracks["failed_tracks"], con
+    etiqueta y clase de error), para poder reintentarla más adelante.
+    """
     video_ids = []
     missed_tracks = {
         "count": 0,
-        "tracks": []
+        "tracks": [],
+        "cached_tracks": [],
+        "failed_tracks": []
     }
-    for track in tracks:
+    reused = 0
+    isrc_matches = 0
+    for searched, track in enumerate(tracks):
+        if cancel_token:
+            cancel_token.raise_if_cancelled()
+        if on_progress and searched and searched % SEARCH_PROGRESS_EVERY == 0:
+            on_progress(searched, len(tracks))
+        track = Track.from_dict(track)
+        
+        if video_id_map is not None and track.id in video_id_map:
+            video_ids.append(video_id_map[track.id])
+            reused += 1
+            continue
+        
+        if match_cache is not None and match_cache.known_miss(miss_key(track)):
+            print(f"{track.label} not found on YouTube Music (cached miss)")
+            missed_tracks["count"] += 1
+            missed_tracks["tracks"].append(track.label)
+            missed_tracks["cached_tracks"].append(track.label)
+            continue
+        
+        # Una canción con un resultado negativo vencido se vuelve a buscar en la red, no en
+        # candidate_cache: cada búsqueda fallida registrada tiene que ser una búsqueda real
+        recheck = match_cache is not None and match_cache.miss_count(miss_key(track)) > 0
+        
         try :
-            search_string = f"{track['name']} {track['artists'][0]}"
-            video_id = ytmusic.search(search_string, filter="songs")[0]["videoId"]
+            video_id = search_by_isrc(ytmusic, track, match_cache, cancel_token)
+            if video_id:
+                isrc_matches += 1
+            else:
+                candidates = search_candidates(ytmusic, search_query(track), cancel_token, refresh=recheck)
+                video_id, score = best_candidate(track, candidates)
+                if not video_id:
+                    raise NoMatchFound(f"Best candidate scored {score}")
             video_ids.append(video_id)
-        except :
-            print(f"{track['name']} {track['artists'][0]} not found on YouTube Music")
+            if video_id_map is not None and track.id:
+                video_id_map[track.id] = video_id
+            if match_cache is not None:
+                match_cache.forget_miss(miss_key(track))
+        except NoMatchFound:
+            print(f"{track.label} not found on YouTube Music")
             missed_tracks["count"] += 1
-            missed_tracks["tracks"].append(f"{track['name']} {track['artists'][0]}")
+            missed_tracks["tracks"].append(track.label)
+            if match_cache is not None:
+                match_cache.record_miss(miss_key(track))
+        except TransferCancelled:
+            raise
+        except Exception as e:
+            error_class = classify_error(e)
+            print(f"Search failed for {track.label} ({error_class}): {str(e).strip()}")
+            missed_tracks["failed_tracks"].append({"track": track.label, "error": error_class})
+    if match_cache is not None:
+        match_cache.flush()
+    if reused:
+        print(f"Reused {reused} songs from the previous sync, searched {len(tracks) - reused}")
+    if isrc_matches:
+        print(f"Matched {isrc_matches} songs by ISRC")
+    if missed_tracks["cached_tracks"]:
+        print(f"Skipped {len(missed_tracks['cached_tracks'])} songs already known to be missing")
+    if missed_tracks["failed_tracks"]:
+        print(f"{len(missed_tracks['failed_tracks'])} searches failed with errors (not counted as missing)")
     print(f"Found {len(video_ids)} songs on YouTube Music")
     if len(video_ids) == 0:
-        raise Exception("No songs found on YouTube Music")
+        if missed_tracks["failed_tracks"]:
+            raise Exception(f"Search failed for {len(missed_tracks['failed_tracks'])} songs on YouTube Music")
+        raise NoMatchFound("No songs found on YouTube Music")
     return video_ids, missed_tracks
 
 
@@ -165,17 +574,46 @@ def setup_ytmusic(headers=None):
     raise Exception("No valid credentials found for YouTube Music. Please provide auth headers in the app settings.")
 
 
-def create_ytm_playlist(playlist_link, headers):
-    ytmusic = setup_ytmusic(headers)
+def create_ytm_playlist(playlist_link, headers, transfer_id=None, progress_tracker=None, cancel_token=None, match_cache=None):
+    """
+    Clona una playlist de Spotify (por enlace) en YouTube Music.
+    
+    Args:
+        playlist_link: Enlace de la playlist de Spotify
+        headers: Headers de autenticación de YouTube Music
+        transfer_id: ID del job cuando se ejecuta en modo asíncrono
+        progress_tracker: JobStore compartido para actualizar progreso en tiempo real
+        cancel_token: CancellationToken opcional, verificado dentro del loop de búsqueda
+        match_cache: MatchCache global opcional de coincidencias por ISRC
+        
+    Returns:
+        Diccionario con las canciones no encontradas e información de la playlist creada
+    
+    Raises:
+        CredentialsRejected si YouTube Music rechaza la credencial (ver circuit_breaker.py)
+    """
+    def update_progress(status, **kwargs):
+        """Actualiza el progreso en tiempo real (la única playlist del job)"""
+        if progress_tracker and transfer_id and transfer_id in progress_tracker:
+            progress_tracker[transfer_id].update_playlist(0, {**kwargs, "status": status})
+    
+    def on_search_progress(searched, total):
+        update_progress("searching_songs", searched_tracks=searched, total_tracks=total)
+    
+    ytmusic = GuardedYTMusic(setup_ytmusic(headers), CircuitBreaker())
+    probe_credentials(ytmusic)
+    update_progress("fetching_details")
     tracks = get_all_tracks(playlist_link, "IN")
     name = get_playlist_name(playlist_link)
     
     # Obtener los video IDs de las canciones de Spotify
     print(f"Searching for songs on YouTube Music...")
-    new_video_ids, missed_tracks = get_video_ids(ytmusic, tracks)
+    update_progress("searching_songs", name=name, total_tracks=len(tracks), searched_tracks=0)
+    new_video_ids, missed_tracks = get_video_ids(ytmusic, tracks, cancel_token, on_search_progress, match_cache=match_cache)
     
     # Verificar si la playlist ya existe
     print(f"Checking if playlist '{name}' already exists...")
+    update_progress("checking_existing", found_tracks=len(new_video_ids), missed_tracks=missed_tracks["count"])
     existing_playlist_id = check_playlist_exists(ytmusic, name)
     
     if existing_playlist_id:
@@ -187,26 +625,35 @@ def create_ytm_playlist(playlist_link, headers):
         if playlists_are_different(existing_video_ids, new_video_ids):
             # Hay diferencias, eliminar la playlist vieja y crear una nueva
             print(f"Playlist has changes. Deleting old playlist and creating updated version...")
+            update_progress("updating")
             try:
                 ytmusic.delete_playlist(existing_playlist_id)
                 print(f"Old playlist deleted successfully")
             except Exception as e:
                 print(f"Error deleting old playlist: {e}")
+            if len(existing_video_ids) >= MAX_PLAYLIST_TRACKS:
+                delete_playlist_parts(ytmusic, name)
             
             # Crear la nueva playlist con las canciones actualizadas
-            playlist_id = ytmusic.create_playlist(name, "", "PRIVATE", new_video_ids)
+            playlist_ids = create_playlist_chunked(ytmusic, name, new_video_ids, cancel_token,
+                                                   lambda written, total: update_progress("updating", written_tracks=written))
+            playlist_id = playlist_ids[0]
             
             # Agregar información adicional a la respuesta
             missed_tracks["playlist_exists"] = False
             missed_tracks["playlist_updated"] = True
             missed_tracks["playlist_id"] = playlist_id
             missed_tracks["playlist_name"] = name
+            if len(playlist_ids) > 1:
+                missed_tracks["playlist_parts"] = playlist_ids
             
             print(f"Playlist '{name}' updated successfully with ID: {playlist_id}")
+            update_progress("updated", playlist_id=playlist_id)
             return missed_tracks
         else:
             # No hay cambios, playlist está actualizada
             print(f"Playlist '{name}' is already up to date. No changes needed.")
+            update_progress("up_to_date", playlist_id=existing_playlist_id)
             return {
                 "count": 0,
                 "tracks": [],
@@ -218,34 +665,62 @@ def create_ytm_playlist(playlist_link, headers):
     
     # Si no existe, crear la playlist normalmente
     print(f"Playlist '{name}' does not exist. Creating new playlist...")
-    playlist_id = ytmusic.create_playlist(name, "", "PRIVATE", new_video_ids)
+    update_progress("creating")
+    playlist_ids = create_playlist_chunked(ytmusic, name, new_video_ids, cancel_token,
+                                           lambda written, total: update_progress("creating", written_tracks=written))
+    playlist_id = playlist_ids[0]
     
     # Agregar información adicional a la respuesta
     missed_tracks["playlist_exists"] = False
     missed_tracks["playlist_updated"] = False
     missed_tracks["playlist_id"] = playlist_id
     missed_tracks["playlist_name"] = name
+    if len(playlist_ids) > 1:
+        missed_tracks["playlist_parts"] = playlist_ids
     
     print(f"Playlist '{name}' created successfully with ID: {playlist_id}")
+    update_progress("created", playlist_id=playlist_id)
     return missed_tracks
 
 
-def transfer_all_playlists(playlists_data, headers, transfer_id=None, progress_tracker=None, cancelled_transfers=None):
+def transfer_all_playlists(playlists_data, headers, transfer_id=None, progress_tracker=None, cancelled_transfers=None, cancel_token=None, sync_state=None, match_cache=None,
+                           on_library_change=None):
     """
     Transfiere múltiples playlists de Spotify a YouTube Music.
     
+    El trabajo se divide en tres etapas concurrentes conectadas por colas acotadas
+    (ver pipeline.run_pipeline): obtener detalles en Spotify, buscar canciones en
+    YouTube Music y escribir la playlist. Así la escritura de la playlist N se solapa
+    con la búsqueda de la N+1 y la descarga de la N+2.
+    
+    Con sync_state, las playlists cuya huella de contenido no cambió desde la última
+    sincronización se marcan "up_to_date" sin buscar canciones ni consultar YouTube Music.
+    
     Args:
-        playlists_data: Lista de diccionarios con información de las playlists
-                       Cada item debe tener: id, name, total_tracks
+        playlists_data: Lista de diccionarios con información de las playlists, ya ordenada
+                       (ver order_playlists). Cada item debe tener: id, name, total_tracks
         headers: Headers de autenticación de YouTube Music
         transfer_id: ID único de la transferencia para tracking
-        progress_tracker: Diccionario compartido para actualizar progreso en tiempo real
+        progress_tracker: JobStore compartido para actualizar progreso en tiempo real
         cancelled_transfers: Set de IDs de transferencias canceladas
+        cancel_token: CancellationToken opcional, verificado dentro de cada loop por canción
+        sync_state: AccountSyncState opcional de la cuenta de YouTube Music (ver sync_state.py)
+        match_cache: MatchCache global opcional de coincidencias por ISRC
+        on_library_change: Función opcional llamada después de crear o actualizar cada playlist
         
     Returns:
         Diccionario con resultados de la transferencia para cada playlist
+    
+    Raises:
+        CredentialsRejected si la credencial no pasa la verificación inicial o el breaker
+        se abre durante el job (ver circuit_breaker.py)
     """
-    ytmusic = setup_ytmusic(headers)
+    # Un cliente por etapa que habla con YouTube Music para no compartir la sesión HTTP entre
+    # hilos, ambos detrás del mismo breaker: con la credencial vencida el job se detiene
+    breaker = CircuitBreaker()
+    search_ytmusic = GuardedYTMusic(setup_ytmusic(headers), breaker)
+    write_ytmusic = GuardedYTMusic(setup_ytmusic(headers), breaker)
+    probe_credentials(search_ytmusic)
     
     results = {
         "total_playlists": len(playlists_data),
@@ -253,188 +728,290 @@ def transfer_all_playlists(playlists_data, headers, transfer_id=None, progress_t
         "successful": 0,
         "failed": 0,
         "skipped": 0,
-        "playlists": []
+        "playlists": [],
+        "stages": {}
     }
     
     def update_progress(playlist_index, status, **kwargs):
         """Actualiza el progreso en tiempo real"""
         if progress_tracker and transfer_id and transfer_id in progress_tracker:
-            progress_tracker[transfer_id]["playlists"][playlist_index]["status"] = status
-            for key, value in kwargs.items():
-                progress_tracker[transfer_id]["playlists"][playlist_index][key] = value
-            progress_tracker[transfer_id]["processed"] = results["processed"]
-            progress_tracker[transfer_id]["successful"] = results["successful"]
-            progress_tracker[transfer_id]["failed"] = results["failed"]
-            progress_tracker[transfer_id]["skipped"] = results["skipped"]
+            progress_tracker[transfer_id].update_playlist(
+                playlist_index, {**kwargs, "status": status},
+                processed=results["processed"],
+                successful=results["successful"],
+                failed=results["failed"],
+                skipped=results["skipped"]
+            )
     
     def is_cancelled():
-        """Verifica si la transferencia fue cancelada"""
+        """Verifica si la transferencia fue cancelada, superó su deadline o se rechazó la credencial"""
+        if cancel_token and cancel_token.is_cancelled() or breaker.tripped:
+            return True
         return cancelled_transfers and transfer_id and transfer_id in cancelled_transfers
     
-    for i, playlist_info in enumerate(playlists_data):
-        # Verificar si la transferencia fue cancelada
-        if is_cancelled():
-            print(f"\n=== Transfer Cancelled by User ===")
-            break
+    job_start = time.time()
+    
+    def update_etas(next_index):
+        """Recalcula el ETA de las playlists pendientes con la velocidad medida hasta ahora"""
+        if not (progress_tracker and transfer_id and transfer_id in progress_tracker):
+            return
+        done_cost = sum(playlist_cost(p) for p in playlists_data[:next_index])
+        seconds_per_track = (time.time() - job_start) / done_cost if done_cost else DEFAULT_SECONDS_PER_TRACK
         
-        playlist_id = playlist_info["id"]
-        playlist_name = playlist_info["name"]
-        playlist_image = playlist_info.get("image")
+        # Las playlists ya registradas tienen eta_seconds=0 (ver record_result); solo se tocan las pendientes
+        etas = estimate_etas(playlists_data[next_index:], seconds_per_track)
+        eta_updates = {}
+        for offset, eta in enumerate(etas):
+            eta_updates[next_index + offset] = {"eta_seconds": eta}
         
-        print(f"\n[{i+1}/{len(playlists_data)}] Processing playlist: '{playlist_name}' (ID: {playlist_id})")
-        update_progress(i, "processing", image=playlist_image)
+        # Los contadores de las etapas se publican como copia: los hilos del pipeline los siguen modificando
+        stages = {name: dict(counters) for name, counters in results["stages"].items()}
+        progress_tracker[transfer_id].update_playlists(eta_updates, eta_seconds=etas[-1] if etas else 0, stages=stages)
+    
+    def fetch_stage(job):
+        """Etapa 1: obtener detalles de la playlist (nombre y canciones) desde Spotify"""
+        i = job["index"]
+        print(f"\n[{i+1}/{len(playlists_data)}] Processing playlist: '{job['name']}' (ID: {job['id']})")
+        update_progress(i, "fetching_details", image=job["image"])
         
-        try:
-            # Obtener detalles de la playlist (nombre y canciones)
-            update_progress(i, "fetching_details", image=playlist_image)
-            playlist_details = get_playlist_details_by_id(playlist_id)
-            tracks = playlist_details["tracks"]
-            name = playlist_details["name"]
-            image = playlist_details.get("image") or playlist_image
-            
-            if len(tracks) == 0:
-                print(f"Playlist '{name}' is empty, skipping...")
-                results["skipped"] += 1
-                playlist_result = {
-                    "name": name,
-                    "status": "skipped",
-                    "reason": "Empty playlist",
-                    "missed_tracks": 0,
-                    "image": image
-                }
-                results["playlists"].append(playlist_result)
-                results["processed"] += 1
-                update_progress(i, "skipped", name=name, reason="Empty playlist", missed_tracks=0, image=image)
-                continue
-            
-            # Buscar las canciones en YouTube Music
-            print(f"Searching for {len(tracks)} songs on YouTube Music...")
-            update_progress(i, "searching_songs", total_tracks=len(tracks), image=image)
-            new_video_ids, missed_tracks = get_video_ids(ytmusic, tracks)
-            
-            # Check cancellation after search
-            if is_cancelled():
-                print(f"\n=== Transfer Cancelled by User ===")
-                break
-            
-            if len(new_video_ids) == 0:
-                print(f"No songs found on YouTube Music for playlist '{name}', skipping...")
-                results["failed"] += 1
-                playlist_result = {
-                    "name": name,
-                    "status": "failed",
-                    "reason": "No songs found on YouTube Music",
-                    "missed_tracks": len(tracks),
-                    "image": image
+        playlist_details = get_playlist_details_by_id(job["id"], cancel_token=cancel_token)
+        job["tracks"] = playlist_details["tracks"]
+        job["name"] = playlist_details["name"]
+        job["image"] = playlist_details.get("image") or job["image"]
+        
+        if len(job["tracks"]) == 0:
+            print(f"Playlist '{job['name']}' is empty, skipping...")
+            job["result"] = {
+                "name": job["name"],
+                "status": "skipped",
+                "reason": "Empty playlist",
+                "missed_tracks": 0,
+                "image": job["image"]
+            }
+        elif sync_state is not None:
+            job["fingerprint"] = playlist_fingerprint(job["name"], job["tracks"])
+            # Canciones ya resueltas en la última sincronización: solo se buscan las nuevas
+            job["video_id_map"] = sync_state.video_ids(job["id"])
+            synced = sync_state.get(job["id"])
+            if synced and synced["fingerprint"] == job["fingerprint"]:
+                print(f"Playlist '{job['name']}' unchanged since last sync, skipping YouTube Music checks")
+                job["result"] = {
+                    "name": job["name"],
+                    "status": "up_to_date",
+                    "playlist_id": synced["playlist_id"],
+                    "total_tracks": len(job["tracks"]),
+                    "found_tracks": synced["found_tracks"],
+                    "missed_tracks": synced["missed_tracks"],
+                    "missed_tracks_list": synced["missed_tracks_list"],
+                    "cached_missed_tracks_list": synced.get("cached_missed_tracks_list", []),
+                    "unchanged_since_last_sync": True,
+                    "image": job["image"]
                 }
-                results["playlists"].append(playlist_result)
-                results["processed"] += 1
-                update_progress(i, "failed", name=name, reason="No songs found on YouTube Music", missed_tracks=len(tracks), image=image)
-                continue
-            
-            # Check cancellation before checking existing
-            if is_cancelled():
-                print(f"\n=== Transfer Cancelled by User ===")
-                break
-            
-            # Verificar si la playlist ya existe
-            print(f"Checking if playlist '{name}' already exists...")
-            update_progress(i, "checking_existing", found_tracks=len(new_video_ids), image=image)
-            existing_playlist_id = check_playlist_exists(ytmusic, name)
-            
-            playlist_result = {
+        return job
+    
+    def search_stage(job):
+        """Etapa 2: buscar las canciones en YouTube Music"""
+        if "result" in job:
+            return job
+        
+        i, name, image, tracks = job["index"], job["name"], job["image"], job["tracks"]
+        print(f"Searching for {len(tracks)} songs of '{name}' on YouTube Music...")
+        update_progress(i, "searching_songs", total_tracks=len(tracks), image=image)
+        try:
+            job["video_ids"], job["missed_tracks"] = get_video_ids(search_ytmusic, tracks, cancel_token,
+                                                                   video_id_map=job.get("video_id_map"), match_cache=match_cache)
+        except TransferCancelled:
+            raise
+        except NoMatchFound:
+            print(f"No songs found on YouTube Music for playlist '{name}', skipping...")
+            job["result"] = {
                 "name": name,
-                "total_tracks": len(tracks),
-                "found_tracks": len(new_video_ids),
-                "missed_tracks": missed_tracks["count"],
-                "missed_tracks_list": missed_tracks["tracks"],
+                "status": "failed",
+                "reason": "No songs found on YouTube Music",
+                "missed_tracks": len(tracks),
                 "image": image
             }
-            
-            if existing_playlist_id:
-                # La playlist existe, verificar si hay cambios
-                print(f"Playlist '{name}' already exists. Checking for updates...")
-                existing_video_ids = get_existing_playlist_tracks(ytmusic, existing_playlist_id)
-                
-                if playlists_are_different(existing_video_ids, new_video_ids):
-                    # Hay diferencias, actualizar la playlist
-                    print(f"Playlist has changes. Updating...")
-                    update_progress(i, "updating", image=image)
-                    try:
-                        ytmusic.delete_playlist(existing_playlist_id)
-                        print(f"Old playlist deleted")
-                    except Exception as e:
-                        print(f"Error deleting old playlist: {e}")
-                    
-                    new_playlist_id = ytmusic.create_playlist(name, "", "PRIVATE", new_video_ids)
-                    playlist_result["status"] = "updated"
-                    playlist_result["playlist_id"] = new_playlist_id
-                    results["successful"] += 1
-                    print(f"Playlist '{name}' updated successfully")
-                    update_progress(i, "updated", name=name, playlist_id=new_playlist_id, 
-                                  total_tracks=playlist_result["total_tracks"],
-                                  found_tracks=playlist_result["found_tracks"],
-                                  missed_tracks=playlist_result["missed_tracks"],
-                                  missed_tracks_list=playlist_result["missed_tracks_list"],
-                                  image=image)
-                else:
-                    # No hay cambios
-                    playlist_result["status"] = "up_to_date"
-                    playlist_result["playlist_id"] = existing_playlist_id
-                    results["skipped"] += 1
-                    print(f"Playlist '{name}' is already up to date")
-                    update_progress(i, "up_to_date", name=name, playlist_id=existing_playlist_id,
-                                  total_tracks=playlist_result["total_tracks"],
-                                  found_tracks=playlist_result["found_tracks"],
-                                  missed_tracks=playlist_result["missed_tracks"],
-                                  missed_tracks_list=playlist_result["missed_tracks_list"],
-                                  image=image)
-            else:
-                # Crear nueva playlist
-                print(f"Creating new playlist '{name}'...")
-                update_progress(i, "creating")
-                new_playlist_id = ytmusic.create_playlist(name, "", "PRIVATE", new_video_ids)
-                
-                # Check cancellation after creating playlist
-                if is_cancelled():
-                    print(f"\n=== Transfer Cancelled by User ===")
-                    break
-                
-                playlist_result["status"] = "created"
-                playlist_result["playlist_id"] = new_playlist_id
-                results["successful"] += 1
-                print(f"Playlist '{name}' created successfully")
-                update_progress(i, "created", name=name, playlist_id=new_playlist_id,
-                              total_tracks=playlist_result["total_tracks"],
-                              found_tracks=playlist_result["found_tracks"],
-                              missed_tracks=playlist_result["missed_tracks"],
-                              missed_tracks_list=playlist_result["missed_tracks_list"],
-                              image=image)
-            
-            results["playlists"].append(playlist_result)
-            results["processed"] += 1
-            
         except Exception as e:
-            print(f"Error processing playlist '{playlist_name}': {str(e)}")
-            results["failed"] += 1
-            playlist_result = {
-                "name": playlist_name,
+            # Errores de búsqueda (no canciones inexistentes): no cuentan como no encontradas
+            print(f"Searching songs of '{name}' failed: {e}")
+            job["result"] = {
+                "name": name,
                 "status": "failed",
                 "reason": str(e),
                 "missed_tracks": 0,
-                "image": playlist_image
+                "image": image
             }
-            results["playlists"].append(playlist_result)
-            results["processed"] += 1
-            update_progress(i, "failed", name=playlist_name, reason=str(e), missed_tracks=0, image=playlist_image)
+        return job
+    
+    def write_stage(job):
+        """Etapa 3: crear o actualizar la playlist en YouTube Music y registrar el resultado"""
+        if "result" not in job:
+            job["result"] = write_playlist(job)
+            
+            # Guardar la huella solo si la playlist quedó sincronizada con un ID válido y sin
+            # búsquedas fallidas (si no, la próxima sincronización no las reintentaría)
+            if (sync_state is not None and isinstance(job["result"].get("playlist_id"), str)
+                    and not job["result"]["failed_tracks"]):
+                # Solo se guardan las canciones que siguen en la playlist
+                track_ids = {track.id for track in job["tracks"]}
+                video_ids = {track_id: video_id for track_id, video_id in job["video_id_map"].items() if track_id in track_ids}
+                sync_state.record(job["id"], job["fingerprint"], job["result"], video_ids)
+        
+        record_result(job["index"], job["result"])
+        update_etas(job["index"] + 1)
+        return None
+    
+    def record_result(playlist_index, playlist_result):
+        """
+        Registra el resultado final de una playlist. La misma entrada se guarda en
+        results y se publica en el progreso, sin duplicar diccionarios ni listas.
+        """
+        if playlist_result["status"] in ("created", "updated"):
+            results["successful"] += 1
+        elif playlist_result["status"] in ("skipped", "up_to_date"):
+            results["skipped"] += 1
+        else:
+            results["failed"] += 1
+        results["processed"] += 1
+        
+        entry = {**playlist_result, "eta_seconds": 0}
+        if progress_tracker and transfer_id and transfer_id in progress_tracker:
+            progress = progress_tracker[transfer_id]
+            entry = {**progress.snapshot()["playlists"][playlist_index], **entry}
+            progress.set_playlist(
+                playlist_index, entry,
+                processed=results["processed"],
+                successful=results["successful"],
+                failed=results["failed"],
+                skipped=results["skipped"]
+            )
+        results["playlists"].append(entry)
+    
+    def write_playlist(job):
+        i, name, image = job["index"], job["name"], job["image"]
+        new_video_ids, missed_tracks = job["video_ids"], job["missed_tracks"]
+        
+        # Verificar si la playlist ya existe
+        print(f"Checking if playlist '{name}' already exists...")
+        update_progress(i, "checking_existing", found_tracks=len(new_video_ids), image=image)
+        existing_playlist_id = check_playlist_exists(write_ytmusic, name)
+        
+        playlist_result = {
+            "name": name,
+            "total_tracks": len(job["tracks"]),
+            "found_tracks": len(new_video_ids),
+            "missed_tracks": missed_tracks["count"],
+            "missed_tracks_list": missed_tracks["tracks"],
+            "cached_missed_tracks_list": missed_tracks["cached_tracks"],
+            "failed_tracks": len(missed_tracks["failed_tracks"]),
+            "failed_tracks_list": missed_tracks["failed_tracks"],
+            "image": image
+        }
+        
+        if existing_playlist_id:
+            # La playlist existe, verificar si hay cambios
+            print(f"Playlist '{name}' already exists. Checking for updates...")
+            existing_video_ids = get_existing_playlist_tracks(write_ytmusic, existing_playlist_id)
+            
+            if playlists_are_different(existing_video_ids, new_video_ids):
+                # Hay diferencias, actualizar la playlist
+                print(f"Playlist has changes. Updating...")
+                update_progress(i, "updating", image=image)
+                try:
+                    write_ytmusic.delete_playlist(existing_playlist_id)
+                    print(f"Old playlist deleted")
+                except Exception as e:
+                    print(f"Error deleting old playlist: {e}")
+                if len(existing_video_ids) >= MAX_PLAYLIST_TRACKS:
+                    delete_playlist_parts(write_ytmusic, name)
+                
+                playlist_result["status"] = "updated"
+                set_playlist_ids(playlist_result, create_playlist_chunked(
+                    write_ytmusic, name, new_video_ids, cancel_token,
+                    lambda written, total: update_progress(i, "updating", written_tracks=written)))
+                if on_library_change:
+                    on_library_change()
+                print(f"Playlist '{name}' updated successfully")
+            else:
+                # No hay cambios
+                playlist_result["status"] = "up_to_date"
+                playlist_result["playlist_id"] = existing_playlist_id
+                print(f"Playlist '{name}' is already up to date")
+        else:
+            # Crear nueva playlist
+            print(f"Creating new playlist '{name}'...")
+            update_progress(i, "creating")
+            playlist_result["status"] = "created"
+            set_playlist_ids(playlist_result, create_playlist_chunked(
+                write_ytmusic, name, new_video_ids, cancel_token,
+                lambda written, total: update_progress(i, "creating", written_tracks=written)))
+            if on_library_change:
+                on_library_change()
+            print(f"Playlist '{name}' created successfully")
+        
+        return playlist_result
+    
+    def on_stage_error(job, stage_name, error):
+        """Convierte el error de cualquier etapa en un resultado fallido para la playlist"""
+        if isinstance(error, TransferCancelled):
+            # El job se detuvo a mitad de la playlist: se descarta sin registrar resultado
+            return None
+        print(f"Error processing playlist '{job['name']}': {str(error)}")
+        job["result"] = {
+            "name": job["name"],
+            "status": "failed",
+            "reason": str(error),
+            "missed_tracks": 0,
+            "image": job["image"]
+        }
+        if stage_name == "write":
+            # La etapa de escritura es el sumidero: registrar el resultado aquí mismo
+            record_result(job["index"], job["result"])
+            update_etas(job["index"] + 1)
+            return None
+        return job
+    
+    jobs = (
+        {
+            "index": i,
+            "id": playlist_info["id"],
+            "name": playlist_info["name"],
+            "image": playlist_info.get("image")
+        }
+        for i, playlist_info in enumerate(playlists_data)
+    )
+    
+    try:
+        run_pipeline(
+            jobs,
+            [("fetch", fetch_stage), ("search", search_stage), ("write", write_stage)],
+            queue_size=PIPELINE_QUEUE_SIZE,
+            is_cancelled=is_cancelled,
+            on_error=on_stage_error,
+            stats=results["stages"]
+        )
+    finally:
+        # Las sincronizaciones registradas por write_stage se guardan una sola vez por job
+        if sync_state is not None:
+            sync_state.flush()
+    
+    breaker.check()
+    if cancel_token and cancel_token.reason == "deadline_exceeded":
+        print(f"\n=== Transfer Deadline Exceeded ===")
+    elif is_cancelled():
+        print(f"\n=== Transfer Cancelled by User ===")
+    else:
+        update_etas(len(playlists_data))
     
     print(f"\n=== Transfer Complete ===")
     print(f"Total: {results['total_playlists']} | Successful: {results['successful']} | Failed: {results['failed']} | Skipped: {results['skipped']}")
+    print(f"Stages: " + " | ".join(f"{name}: {s['processed']} items, {s['items_per_minute']}/min" for name, s in results["stages"].items()))
     
     return results
 
 
-def transfer_selected_tracks(playlists_data, headers, transfer_id=None, progress_tracker=None, cancelled_transfers=None):
+def transfer_selected_tracks(playlists_data, headers, transfer_id=None, progress_tracker=None, cancelled_transfers=None, cancel_token=None, match_cache=None,
+                             on_library_change=None):
     """
     Transfiere playlists con canciones seleccionadas específicas a YouTube Music.
     
@@ -443,13 +1020,21 @@ def transfer_selected_tracks(playlists_data, headers, transfer_id=None, progress
                        Cada item debe tener: name, tracks (lista de canciones)
         headers: Headers de autenticación de YouTube Music
         transfer_id: ID único de la transferencia para tracking
-        progress_tracker: Diccionario compartido para actualizar progreso en tiempo real
+        progress_tracker: JobStore compartido para actualizar progreso en tiempo real
         cancelled_transfers: Set de IDs de transferencias canceladas
+        cancel_token: CancellationToken opcional, verificado dentro de cada loop por canción
+        match_cache: MatchCache global opcional de coincidencias por ISRC
+        on_library_change: Función opcional llamada después de crear o actualizar cada playlist
         
     Returns:
         Diccionario con resultados de la transferencia para cada playlist
+    
+    Raises:
+        CredentialsRejected si YouTube Music rechaza la credencial (ver circuit_breaker.py)
     """
-    ytmusic = setup_ytmusic(headers)
+    breaker = CircuitBreaker()
+    ytmusic = GuardedYTMusic(setup_ytmusic(headers), breaker)
+    probe_credentials(ytmusic)
     
     results = {
         "total_playlists": len(playlists_data),
@@ -463,16 +1048,18 @@ def transfer_selected_tracks(playlists_data, headers, transfer_id=None, progress
     def update_progress(playlist_index, status, **kwargs):
         """Actualiza el progreso en tiempo real"""
         if progress_tracker and transfer_id and transfer_id in progress_tracker:
-            progress_tracker[transfer_id]["playlists"][playlist_index]["status"] = status
-            for key, value in kwargs.items():
-                progress_tracker[transfer_id]["playlists"][playlist_index][key] = value
-            progress_tracker[transfer_id]["processed"] = results["processed"]
-            progress_tracker[transfer_id]["successful"] = results["successful"]
-            progress_tracker[transfer_id]["failed"] = results["failed"]
-            progress_tracker[transfer_id]["skipped"] = results["skipped"]
+            progress_tracker[transfer_id].update_playlist(
+                playlist_index, {**kwargs, "status": status},
+                processed=results["processed"],
+                successful=results["successful"],
+                failed=results["failed"],
+                skipped=results["skipped"]
+            )
     
     def is_cancelled():
-        """Verifica si la transferencia fue cancelada"""
+        """Verifica si la transferencia fue cancelada, superó su deadline o se rechazó la credencial"""
+        if cancel_token and cancel_token.is_cancelled() or breaker.tripped:
+            return True
         return cancelled_transfers and transfer_id and transfer_id in cancelled_transfers
     
     for i, playlist_info in enumerate(playlists_data):
@@ -507,7 +1094,11 @@ def transfer_selected_tracks(playlists_data, headers, transfer_id=None, progress
             # Buscar las canciones en YouTube Music
             print(f"Searching for {len(tracks)} songs on YouTube Music...")
             update_progress(i, "searching_songs", total_tracks=len(tracks), image=playlist_image)
-            new_video_ids, missed_tracks = get_video_ids(ytmusic, tracks)
+            try:
+                new_video_ids, missed_tracks = get_video_ids(ytmusic, tracks, cancel_token, match_cache=match_cache)
+            except TransferCancelled:
+                print(f"\n=== Transfer Cancelled by User ===")
+                break
             
             if len(new_video_ids) == 0:
                 print(f"No songs found on YouTube Music for playlist '{playlist_name}', skipping...")
@@ -535,6 +1126,9 @@ def transfer_selected_tracks(playlists_data, headers, transfer_id=None, progress
                 "found_tracks": len(new_video_ids),
                 "missed_tracks": missed_tracks["count"],
                 "missed_tracks_list": missed_tracks["tracks"],
+                "cached_missed_tracks_list": missed_tracks["cached_tracks"],
+                "failed_tracks": len(missed_tracks["failed_tracks"]),
+                "failed_tracks_list": missed_tracks["failed_tracks"],
                 "image": playlist_image
             }
             
@@ -552,10 +1146,16 @@ def transfer_selected_tracks(playlists_data, headers, transfer_id=None, progress
                         print(f"Old playlist deleted")
                     except Exception as e:
                         print(f"Error deleting old playlist: {e}")
+                    if len(existing_video_ids) >= MAX_PLAYLIST_TRACKS:
+                        delete_playlist_parts(ytmusic, playlist_name)
                     
-                    new_playlist_id = ytmusic.create_playlist(playlist_name, "", "PRIVATE", new_video_ids)
+                    set_playlist_ids(playlist_result, create_playlist_chunked(
+                        ytmusic, playlist_name, new_video_ids, cancel_token,
+                        lambda written, total: update_progress(i, "updating", written_tracks=written)))
+                    new_playlist_id = playlist_result["playlist_id"]
+                    if on_library_change:
+                        on_library_change()
                     playlist_result["status"] = "updated"
-                    playlist_result["playlist_id"] = new_playlist_id
                     results["successful"] += 1
                     print(f"Playlist '{playlist_name}' updated successfully")
                     update_progress(i, "updated", name=playlist_name, playlist_id=new_playlist_id, 
@@ -563,6 +1163,9 @@ def transfer_selected_tracks(playlists_data, headers, transfer_id=None, progress
                                   found_tracks=playlist_result["found_tracks"],
                                   missed_tracks=playlist_result["missed_tracks"],
                                   missed_tracks_list=playlist_result["missed_tracks_list"],
+                                  cached_missed_tracks_list=playlist_result["cached_missed_tracks_list"],
+                                  failed_tracks=playlist_result["failed_tracks"],
+                                  failed_tracks_list=playlist_result["failed_tracks_list"],
                                   image=playlist_image)
                 else:
                     # No hay cambios
@@ -575,14 +1178,21 @@ def transfer_selected_tracks(playlists_data, headers, transfer_id=None, progress
                                   found_tracks=playlist_result["found_tracks"],
                                   missed_tracks=playlist_result["missed_tracks"],
                                   missed_tracks_list=playlist_result["missed_tracks_list"],
+                                  cached_missed_tracks_list=playlist_result["cached_missed_tracks_list"],
+                                  failed_tracks=playlist_result["failed_tracks"],
+                                  failed_tracks_list=playlist_result["failed_tracks_list"],
                                   image=playlist_image)
             else:
                 # Crear nueva playlist
                 print(f"Creating new playlist '{playlist_name}'...")
                 update_progress(i, "creating")
-                new_playlist_id = ytmusic.create_playlist(playlist_name, "", "PRIVATE", new_video_ids)
+                set_playlist_ids(playlist_result, create_playlist_chunked(
+                    ytmusic, playlist_name, new_video_ids, cancel_token,
+                    lambda written, total: update_progress(i, "creating", written_tracks=written)))
+                new_playlist_id = playlist_result["playlist_id"]
+                if on_library_change:
+                    on_library_change()
                 playlist_result["status"] = "created"
-                playlist_result["playlist_id"] = new_playlist_id
                 results["successful"] += 1
                 print(f"Playlist '{playlist_name}' created successfully")
                 update_progress(i, "created", name=playlist_name, playlist_id=new_playlist_id,
@@ -590,6 +1200,9 @@ def transfer_selected_tracks(playlists_data, headers, transfer_id=None, progress
                               found_tracks=playlist_result["found_tracks"],
                               missed_tracks=playlist_result["missed_tracks"],
                               missed_tracks_list=playlist_result["missed_tracks_list"],
+                              cached_missed_tracks_list=playlist_result["cached_missed_tracks_list"],
+                              failed_tracks=playlist_result["failed_tracks"],
+                              failed_tracks_list=playlist_result["failed_tracks_list"],
                               image=playlist_image)
             
             results["playlists"].append(playlist_result)
@@ -609,116 +1222,85 @@ def transfer_selected_tracks(playlists_data, headers, transfer_id=None, progress
             results["processed"] += 1
             update_progress(i, "failed", name=playlist_name, reason=str(e), missed_tracks=0, image=playlist_image)
     
+    breaker.check()
     print(f"\n=== Transfer Complete ===")
     print(f"Total: {results['total_playlists']} | Successful: {results['successful']} | Failed: {results['failed']} | Skipped: {results['skipped']}")
     
     return results
 
 
-def delete_all_ytm_playlists(headers, delete_progress=None, delete_id=None):
+def delete_all_ytm_playlists(headers, delete_progress=None, delete_id=None, cancelled_deletions=None, checkpoint=None,
+                             on_library_change=None):
     """
     Elimina todas las playlists de YouTube Music del usuario.
     
+    Las playlists se eliminan en paralelo con DELETE_CONCURRENCY clientes (ver
+    deletion.delete_playlists), con reintentos por playlist y pausas ante 429.
+    
     Args:
         headers: Headers de autenticación de YouTube Music
-        delete_progress: Diccionario compartido para tracking del progreso (opcional)
+        delete_progress: JobStore compartido para tracking del progreso (opcional)
         delete_id: ID único para esta operación de eliminación (opcional)
+        cancelled_deletions: Set de IDs de eliminaciones canceladas
+        checkpoint: AccountDeletionCheckpoint opcional para reanudar una eliminación interrumpida
+        on_library_change: Función opcional llamada después de eliminar cada playlist
         
     Returns:
         Diccionario con resultados de la eliminación
     """
     ytmusic = setup_ytmusic(headers)
     
-    results = {
-        "total_playlists": 0,
-        "deleted": 0,
-        "failed": 0,
-        "playlists": []
-    }
-    
-    def update_progress(index, status, **kwargs):
-        """Helper para actualizar progreso en tiempo real"""
-        if delete_progress and delete_id:
-            delete_progress[delete_id]["playlists"][index]["status"] = status
-            for key, value in kwargs.items():
-                if key != "status":
-                    delete_progress[delete_id]["playlists"][index][key] = value
-            delete_progress[delete_id]["deleted"] = results["deleted"]
-            delete_progress[delete_id]["failed"] = results["failed"]
-    
     try:
         # Obtener todas las playlists del usuario
         print("Fetching all playlists from YouTube Music...")
-        playlists = ytmusic.get_library_playlists(limit=None)
-        
-        if not playlists:
-            print("No playlists found in YouTube Music")
-            return results
-        
-        results["total_playlists"] = len(playlists)
-        print(f"Found {len(playlists)} playlists to delete")
-        
-        # Inicializar lista de playlists en progreso
-        if delete_progress and delete_id:
-            delete_progress[delete_id]["playlists"] = [
-                {
-                    "name": playlist.get("title", "Unknown"),
-                    "status": "pending",
-                    "playlistId": playlist.get("playlistId")
-                }
-                for playlist in playlists
-            ]
-        
-        # Eliminar cada playlist
-        for i, playlist in enumerate(playlists):
-            playlist_name = playlist.get("title", "Unknown")
-            playlist_id = playlist.get("playlistId")
-            
-            print(f"\n[{i+1}/{len(playlists)}] Deleting playlist: '{playlist_name}'")
-            
-            if not playlist_id:
-                print(f"⚠️  Skipping '{playlist_name}' - No playlist ID")
-                results["failed"] += 1
-                results["playlists"].append({
-                    "name": playlist_name,
-                    "status": "failed",
-                    "reason": "No playlist ID found"
-                })
-                update_progress(i, "failed", reason="No playlist ID found")
-                continue
-            
-            try:
-                update_progress(i, "deleting")
-                
-                # Eliminar la playlist
-                ytmusic.delete_playlist(playlist_id)
-                
-                results["deleted"] += 1
-                results["playlists"].append({
-                    "name": playlist_name,
-                    "status": "deleted",
-                    "playlistId": playlist_id
-                })
-                update_progress(i, "deleted", name=playlist_name)
-                print(f"✅ Deleted: '{playlist_name}'")
-                
-            except Exception as e:
-                print(f"❌ Error deleting '{playlist_name}': {str(e)}")
-                results["failed"] += 1
-                results["playlists"].append({
-                    "name": playlist_name,
-                    "status": "failed",
-                    "reason": str(e)
-                })
-                update_progress(i, "failed", name=playlist_name, reason=str(e))
-        
-        print(f"\n=== Deletion Complete ===")
-        print(f"Total: {results['total_playlists']} | Deleted: {results['deleted']} | Failed: {results['failed']}")
-        
+        library = ytmusic.get_library_playlists(limit=None)
     except Exception as e:
         print(f"Error fetching playlists: {str(e)}")
         raise Exception(f"Failed to fetch playlists: {str(e)}")
     
+    if not library:
+        print("No playlists found in YouTube Music")
+        return {"total_playlists": 0, "deleted": 0, "failed": 0, "playlists": []}
+    
+    playlists = [
+        {"playlistId": playlist.get("playlistId"), "name": playlist.get("title", "Unknown")}
+        for playlist in library
+    ]
+    print(f"Found {len(playlists)} playlists to delete")
+    
+    # Inicializar lista de playlists en progreso
+    if delete_progress and delete_id:
+        delete_progress[delete_id].update(playlists=[
+            {"name": playlist["name"], "status": "pending", "playlistId": playlist["playlistId"]}
+            for playlist in playlists
+        ], total_playlists=len(playlists))
+    
+    return _run_deletion(ytmusic, headers, playlists, delete_progress, delete_id, cancelled_deletions, checkpoint,
+                         on_library_change)
+
+
+def _run_deletion(ytmusic, headers, playlists, delete_progress, delete_id, cancelled_deletions, checkpoint, on_library_change=None):
+    """Ejecuta deletion.delete_playlists publicando el avance en delete_progress."""
+    def update_progress(index, status, deleted=None, failed=None, **kwargs):
+        """Helper para actualizar progreso en tiempo real"""
+        if status == "deleted" and on_library_change:
+            on_library_change()
+        if delete_progress and delete_id and delete_id in delete_progress:
+            counters = {"deleted": deleted, "failed": failed} if deleted is not None else {}
+            delete_progress[delete_id].update_playlist(index, {**kwargs, "status": status}, **counters)
+    
+    def is_cancelled():
+        """Verifica si la eliminación fue cancelada"""
+        return bool(cancelled_deletions and delete_id and delete_id in cancelled_deletions)
+    
+    # Un cliente por hilo para no compartir la sesión HTTP (el primero ya está creado)
+    clients = [ytmusic] + [setup_ytmusic(headers) for _ in range(min(DELETE_CONCURRENCY, len(playlists)) - 1)]
+    results = delete_playlists(clients, playlists, update_progress, is_cancelled, checkpoint)
+    
+    if is_cancelled():
+        print(f"\n=== Deletion Cancelled by User ===")
+    print(f"\n=== Deletion Complete ===")
+    print(f"Total: {results['total_playlists']} | Deleted: {results['deleted']} | Failed: {results['failed']}")
     return results
 
 
@@ -779,120 +1361,55 @@ def get_ytm_playlists(headers):
         raise Exception(f"Failed to fetch playlists: {str(e)}")
 
 
-def delete_selected_ytm_playlists(headers, playlist_ids, delete_progress=None, delete_id=None, cancelled_deletions=None):
+def delete_selected_ytm_playlists(headers, playlist_ids, delete_progress=None, delete_id=None, cancelled_deletions=None, checkpoint=None,
+                                  known_playlists=None, on_library_change=None):
     """
     Elimina playlists seleccionadas de YouTube Music.
     
+    Los nombres e imágenes que se muestran en el progreso salen de known_playlists (lo
+    que envió el cliente o la caché de /ytm-playlists), sin descargar la biblioteca:
+    la eliminación empieza de inmediato. Una playlist sin datos se muestra con su ID.
+    
+    Las playlists se eliminan en paralelo con DELETE_CONCURRENCY clientes (ver
+    deletion.delete_playlists), con reintentos por playlist y pausas ante 429.
+    
     Args:
         headers: Headers de autenticación de YouTube Music
         playlist_ids: Lista de IDs de playlists a eliminar
-        delete_progress: Diccionario compartido para tracking del progreso
+        delete_progress: JobStore compartido para tracking del progreso
         delete_id: ID único para esta operación de eliminación
         cancelled_deletions: Set de IDs de eliminaciones canceladas
+        checkpoint: AccountDeletionCheckpoint opcional para reanudar una eliminación interrumpida
+        known_playlists: Diccionario opcional {ID: {"name", "image"}} con los datos conocidos
+        on_library_change: Función opcional llamada después de eliminar cada playlist
         
     Returns:
         Diccionario con resultados de la eliminación
     """
     ytmusic = setup_ytmusic(headers)
-    
-    results = {
-        "total_playlists": len(playlist_ids),
-        "deleted": 0,
-        "failed": 0,
-        "playlists": []
-    }
-    
-    def update_progress(index, status, **kwargs):
-        """Helper para actualizar progreso en tiempo real"""
-        if delete_progress and delete_id and delete_id in delete_progress:
-            if index < len(delete_progress[delete_id]["playlists"]):
-                delete_progress[delete_id]["playlists"][index]["status"] = status
-                for key, value in kwargs.items():
-                    if key != "status":
-                        delete_progress[delete_id]["playlists"][index][key] = value
-            delete_progress[delete_id]["deleted"] = results["deleted"]
-            delete_progress[delete_id]["failed"] = results["failed"]
-    
-    def is_cancelled():
-        """Verifica si la eliminación fue cancelada"""
-        return cancelled_deletions and delete_id and delete_id in cancelled_deletions
+    known_playlists = known_playlists or {}
     
     try:
-        # Obtener información de las playlists para mostrar nombres
-        print("Fetching playlist details from YouTube Music...")
-        all_playlists = ytmusic.get_library_playlists(limit=None)
-        
-        # Crear un mapa de ID a nombre
-        playlist_map = {p.get("playlistId"): p for p in all_playlists if p.get("playlistId")}
+        playlists = []
+        pending_playlists = []
+        for pid in playlist_ids:
+            playlist_info = known_playlists.get(pid) or {}
+            name = playlist_info.get("name") or pid
+            playlists.append({"playlistId": pid, "name": name})
+            pending_playlists.append({
+                "name": name,
+                "status": "pending",
+                "playlistId": pid,
+                "image": playlist_info.get("image")
+            })
         
         # Inicializar lista de playlists en progreso
         if delete_progress and delete_id:
-            delete_progress[delete_id]["playlists"] = []
-            for pid in playlist_ids:
-                playlist_info = playlist_map.get(pid, {})
-                thumbnails = playlist_info.get("thumbnails", [])
-                image = thumbnails[-1].get("url") if thumbnails else None
-                delete_progress[delete_id]["playlists"].append({
-                    "name": playlist_info.get("title", "Unknown"),
-                    "status": "pending",
-                    "playlistId": pid,
-                    "image": image
-                })
-        
-        # Eliminar cada playlist
-        for i, playlist_id in enumerate(playlist_ids):
-            # Verificar si fue cancelada
-            if is_cancelled():
-                print(f"\n=== Deletion Cancelled by User ===")
-                break
-            
-            playlist_info = playlist_map.get(playlist_id, {})
-            playlist_name = playlist_info.get("title", "Unknown")
-            
-            print(f"\n[{i+1}/{len(playlist_ids)}] Deleting playlist: '{playlist_name}'")
-            
-            if not playlist_id:
-                print(f"⚠️  Skipping - No playlist ID")
-                results["failed"] += 1
-                results["playlists"].append({
-                    "name": playlist_name,
-                    "status": "failed",
-                    "reason": "No playlist ID"
-                })
-                update_progress(i, "failed", reason="No playlist ID")
-                continue
-            
-            try:
-                update_progress(i, "deleting")
-                
-                # Eliminar la playlist
-                ytmusic.delete_playlist(playlist_id)
-                
-                results["deleted"] += 1
-                results["playlists"].append({
-                    "name": playlist_name,
-                    "status": "deleted",
-                    "playlistId": playlist_id
-                })
-                update_progress(i, "deleted", name=playlist_name)
-                print(f"✅ Deleted: '{playlist_name}'")
-                
-            except Exception as e:
-                print(f"❌ Error deleting '{playlist_name}': {str(e)}")
-                results["failed"] += 1
-                results["playlists"].append({
-                    "name": playlist_name,
-                    "status": "failed",
-                    "reason": str(e)
-                })
-                update_progress(i, "failed", name=playlist_name, reason=str(e))
+            delete_progress[delete_id].update(playlists=pending_playlists)
         
-        print(f"\n=== Deletion Complete ===")
-        print(f"Total: {results['total_playlists']} | Deleted: {results['deleted']} | Failed: {results['failed']}")
+        return _run_deletion(ytmusic, headers, playlists, delete_progress, delete_id, cancelled_deletions, checkpoint,
+                             on_library_change)
         
     except Exception as e:
         print(f"Error during deletion: {str(e)}")
         raise Exception(f"Failed during deletion: {str(e)}")
-    
-    return results
-
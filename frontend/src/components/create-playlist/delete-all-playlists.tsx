@@ -238,8 +238,16 @@ export default function DeleteAllPlaylists() {
         setDeleteProgress(null);
 
         try {
-            const body: { auth_headers?: string; playlist_ids: string[] } = {
-                playlist_ids: Array.from(selectedPlaylists)
+            const body: {
+                auth_headers?: string;
+                playlist_ids: string[];
+                playlists: { id: string; name: string; image?: string | null }[];
+            } = {
+                playlist_ids: Array.from(selectedPlaylists),
+                // Nombres ya cargados: el backend no necesita volver a descargar la biblioteca
+                playlists: playlists
+                    .filter((playlist) => selectedPlaylists.has(playlist.id))
+                    .map(({ id, name, image }) => ({ id, name, image })),
             };
             
             if (authHeaders.trim()) {
@@ -44,6 +44,7 @@ export default function InputFields() {
     const [playlistWasUpdated, setPlaylistWasUpdated] = useState(false);
     const [isCloning, setIsCloning] = useState(false);
     const abortControllerRef = useRef<AbortController | null>(null);
+    const createJobIdRef = useRef<string | null>(null);
 
     const { playlistUrl, setPlaylistUrl } = usePlaylist();
 
@@ -63,14 +64,58 @@ export default function InputFields() {
             abortControllerRef.current.abort();
             abortControllerRef.current = null;
         }
+        // Cancelar también el job en el servidor si ya se inició
+        if (createJobIdRef.current) {
+            fetch(`${import.meta.env.VITE_API_URL}/transfer-cancel/${createJobIdRef.current}`, {
+                method: "POST",
+            }).catch(() => {});
+            createJobIdRef.current = null;
+        }
         setIsCloning(false);
         setdialogOpen(false);
     }
 
+    // Espera a que termine el job asíncrono de /create consultando /transfer-status.
+    // Si el servidor ya no conoce el job (404) o falla varias veces seguidas, se detiene
+    // con un estado de error en lugar de consultar para siempre.
+    async function waitForCreateJob(jobId: string, signal: AbortSignal) {
+        const maxConsecutiveFailures = 10;
+        let failures = 0;
+        while (true) {
+            await new Promise((resolve) => setTimeout(resolve, 1000));
+            const res = await fetch(
+                `${import.meta.env.VITE_API_URL}/transfer-status/${jobId}?view=summary`,
+                { method: "GET", signal }
+            );
+            if (res.status === 404) {
+                return {
+                    status: "error",
+                    error: "The clone job is no longer available on the server. Please try again.",
+                };
+            }
+            if (!res.ok) {
+                failures += 1;
+                if (failures >= maxConsecutiveFailures) {
+                    return {
+                        status: "error",
+                        error: `Could not get the clone status (HTTP ${res.status}). Please try again.`,
+                    };
+                }
+                continue;
+            }
+            failures = 0;
+            const status = await res.json();
+            if (status.status !== "in_progress") {
+                return status;
+            }
+        }
+    }
+
     async function clonePlaylist() {
         const body = {
             playlist_link: playlistUrl,
             auth_headers: authHeaders,
+            async: true,
         };
 
         abortControllerRef.current = new AbortController();
@@ -86,7 +131,23 @@ export default function InputFields() {
                 body: JSON.stringify(body),
                 signal: abortControllerRef.current.signal,
             });
-            const data = await res.json();
+            let data = await res.json();
+
+            // La clonación corre en background en el servidor: esperar su resultado
+            if (res.status === 202) {
+                createJobIdRef.current = data.transfer_id;
+                const job = await waitForCreateJob(
+                    data.transfer_id,
+                    abortControllerRef.current.signal
+                );
+                createJobIdRef.current = null;
+                if (job.status !== "completed") {
+                    setCloneError(true);
+                    setCloneErrorMessage(job.error || "Failed to clone playlist");
+                    return;
+                }
+                data = { missed_tracks: job.missed_tracks };
+            }
 
             if (res.ok) {
                 // Verificar si la playlist ya existe y está actualizada (sin cambios)
@@ -134,6 +195,7 @@ export default function InputFields() {
             setIsCloning(false);
             setdialogOpen(false);
             abortControllerRef.current = null;
+            createJobIdRef.current = null;
         }
     }
 
@@ -17,6 +17,7 @@ import { CheckIcon } from "@/components/ui/check.tsx";
 
 interface Track {
     index: number;
+    id?: string;
     name: string;
     artists: string[];
     album: string;
@@ -49,6 +50,9 @@ interface PlaylistStatus {
     found_tracks?: number;
     missed_tracks?: number;
     missed_tracks_list?: string[];
+    cached_missed_tracks_list?: string[];
+    failed_tracks?: number;
+    failed_tracks_list?: { track: string; error: string }[];
     reason?: string;
 }
 
@@ -197,41 +201,84 @@ export default function TransferAll() {
             return;
         }
 
+        // Ya se están recibiendo las canciones
+        if (playlists[playlistIndex].loadingTracks) return;
+
         // Marcar como cargando
         setPlaylists(prev => prev.map(p => 
             p.id === playlistId ? { ...p, loadingTracks: true } : p
         ));
 
+        const resetTracks = () => {
+            setPlaylists(prev => prev.map(p => 
+                p.id === playlistId 
+                    ? { ...p, tracks: [], selectedTracks: new Set<number>(), loadingTracks: false, expanded: false } 
+                    : p
+            ));
+        };
+
+        // Agregar un lote de canciones a medida que llegan (seleccionadas por defecto)
+        const appendTracks = (batch: Track[]) => {
+            setPlaylists(prev => prev.map(p => 
+                p.id === playlistId 
+                    ? { 
+                        ...p, 
+                        tracks: [...p.tracks, ...batch], 
+                        selectedTracks: new Set([...p.selectedTracks, ...batch.map(t => t.index)]),
+                        expanded: true
+                    } 
+                    : p
+            ));
+        };
+
         try {
-            const res = await fetch(`${import.meta.env.VITE_API_URL}/playlist-tracks/${playlistId}`, {
+            // Respuesta NDJSON: una canción por línea, para mostrar las primeras mientras llegan las demás
+            const res = await fetch(`${import.meta.env.VITE_API_URL}/playlist-tracks/${playlistId}?stream=1`, {
                 method: "GET",
                 credentials: 'include',
             });
 
-            const data = await res.json();
+            if (!res.ok || !res.body) {
+                resetTracks();
+                return;
+            }
 
-            if (res.ok) {
-                setPlaylists(prev => prev.map(p => 
-                    p.id === playlistId 
-                        ? { 
-                            ...p, 
-                            tracks: data.tracks, 
-                            loadedTracks: true, 
-                            loadingTracks: false,
-                            selectedTracks: new Set(data.tracks.map((t: Track) => t.index)),
-                            expanded: true
-                        } 
-                        : p
-                ));
-            } else {
-                setPlaylists(prev => prev.map(p => 
-                    p.id === playlistId ? { ...p, loadingTracks: false } : p
-                ));
+            const reader = res.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = "";
+            let failed = false;
+
+            while (true) {
+                const { done, value } = await reader.read();
+                if (done) break;
+
+                buffer += decoder.decode(value, { stream: true });
+                const lines = buffer.split("\n");
+                buffer = lines.pop() ?? "";
+
+                const batch: Track[] = [];
+                for (const line of lines) {
+                    if (!line.trim()) continue;
+                    const item = JSON.parse(line);
+                    if (item.error) {
+                        failed = true;
+                    } else {
+                        batch.push(item);
+                    }
+                }
+                if (batch.length > 0) appendTracks(batch);
             }
-        } catch (error) {
+
+            if (failed) {
+                resetTracks();
+                return;
+            }
+
             setPlaylists(prev => prev.map(p => 
-                p.id === playlistId ? { ...p, loadingTracks: false } : p
+                p.id === playlistId ? { ...p, loadedTracks: true, loadingTracks: false, expanded: true } : p
             ));
+        } catch (error) {
+            resetTracks();
         }
     };
 
@@ -796,7 +843,7 @@ export default function TransferAll() {
                                                 </div>
                                                 
                                                 {/* Lista de canciones expandida */}
-                                                {playlist.expanded && playlist.loadedTracks && (
+                                                {playlist.expanded && (playlist.loadedTracks || playlist.tracks.length > 0) && (
                                                     <div className="ml-6 border-l-3 border-green-400 pl-4 py-2 space-y-1 bg-gray-50/50 dark:bg-gray-800/30 rounded-r-lg">
                                                         <div className="flex items-center justify-between py-2 px-2">
                                                             <span className="text-sm text-gray-600 dark:text-gray-400">